@@ -0,0 +1,356 @@
+import hashlib
+import json
+import re
+
+import gemini_client
+import templates
+
+# ----------------------------
+# Prompt & Response Parsing
+# ----------------------------
+# Shared by the single-transcript page and anything else that analyzes
+# transcripts, so the prompt and the sheet row layout live in one place.
+
+# Loaded once at import; its version is part of the cache key and is saved
+# with every row, so results from older prompt wording can be told apart
+PROMPT_TEMPLATE = templates.load("interview")
+PROMPT_VERSION = PROMPT_TEMPLATE.version_id
+
+
+def prompt_version(structured=False):
+    return f"{PROMPT_VERSION}/json" if structured else PROMPT_VERSION
+
+
+Q1_MARKER = "**Q1."
+Q2_MARKER = "**Q2."
+Q3_MARKER = "**Q3."
+RUBRIC_MARKERS = [
+    "**Rubric Evaluation**",
+    "**Communication Skills**",
+    "**Q4.**",
+    "**Evaluation**"
+]
+DEFAULT_RUBRIC_MARKER = "**Communication Skills**"
+
+RUBRIC_KEYS = [
+    "Communication Skills",
+    "Local Knowledge",
+    "Enthusiasm & Engagement",
+    "Problem-Solving Ability",
+    "Traveler Interaction",
+    "Bonus Score"
+]
+
+# Extra columns written after Total Score, in this order, from AnalysisResult.meta
+META_COLUMNS = [
+    "Prompt Version",
+    "Model",
+    "Retries",
+    "Preprocessing",
+    "Consensus",
+    "Score Variance",
+    "High Disagreement",
+    "Analysis Key",
+]
+# The columns after Total Score are kept for META_COLUMNS, including ones
+# added later; anything else put on the sheet (like rescore's versioned
+# scores) goes after this block, so a new meta column never lands on it
+META_START = 8 + 2 * len(RUBRIC_KEYS) + 1
+META_BLOCK = 20
+EXTRA_COLUMNS_START = META_START + META_BLOCK
+# Sheet column holding analysis_key(); re-submissions update that row
+ANALYSIS_KEY_COLUMN = META_START + META_COLUMNS.index("Analysis Key")
+ANALYSIS_KEY_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+MAX_CELL_SIZE = 49000
+OVERFLOW_SHEET_NAME = "Transcript Overflow"
+
+
+def build_prompt(candidate_name, transcript, structured=False):
+    fmt = "json" if structured else "text"
+    return PROMPT_TEMPLATE.render(fmt, candidate_name=candidate_name, transcript=transcript)
+
+
+def prompt_prefix(structured=False):
+    # The candidate-independent start of every prompt built above
+    return PROMPT_TEMPLATE.prefix("json" if structured else "text")
+
+
+def extract_section(start_marker, next_marker, text):
+    pattern = rf"{re.escape(start_marker)}\s*\**(.*?)(?=\n\s*{re.escape(next_marker)}|\Z)"
+    match = re.search(pattern, text, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def _score_pattern(key, final=True):
+    # While streaming, an explanation only counts as finished once the next
+    # bold heading has started; at the end of the response, $ also closes it.
+    end = r"\n\*\*|\n*$" if final else r"\n\*\*"
+    return re.compile(
+        rf"\*\*{re.escape(key)}\*\*\s*Score:\s*(\d)(?:/5)?\s*Explanation:\s*(.*?)(?={end})",
+        re.DOTALL | re.IGNORECASE
+    )
+
+
+SCORE_PATTERNS = {key: _score_pattern(key) for key in RUBRIC_KEYS}
+PARTIAL_SCORE_PATTERNS = {key: _score_pattern(key, final=False) for key in RUBRIC_KEYS}
+
+
+def parse_text_response(response):
+    rubric_marker = next((m for m in RUBRIC_MARKERS if m in response), DEFAULT_RUBRIC_MARKER)
+
+    q1 = extract_section(Q1_MARKER, Q2_MARKER, response)
+    q2 = extract_section(Q2_MARKER, Q3_MARKER, response)
+    q3 = extract_section(Q3_MARKER, rubric_marker, response)
+
+    # Q4 = everything from the rubric section onward
+    q4_start = response.find(rubric_marker)
+    q4 = response[q4_start:].strip() if q4_start != -1 else ""
+
+    score_dict = {}
+    explanation_dict = {}
+
+    for key in RUBRIC_KEYS:
+        match = SCORE_PATTERNS[key].search(response)
+        if match:
+            score_dict[key] = match.group(1).strip()
+            explanation_dict[key] = match.group(2).strip()
+        else:
+            score_dict[key] = ""
+            explanation_dict[key] = ""
+
+    return AnalysisResult(q1, q2, q3, q4, score_dict, explanation_dict, source="text")
+
+
+def parse_response(response, structured=False):
+    # Structured responses fall back to the regex parser if the model
+    # returned something that isn't the JSON we asked for
+    result = None
+    if structured:
+        try:
+            result = AnalysisResult.from_json(response)
+        except ValueError:
+            pass
+    result = result or parse_text_response(response)
+    result.meta["Prompt Version"] = prompt_version(structured)
+    return result
+
+
+# ----------------------------
+# Structured Output
+# ----------------------------
+# JSON field name for each rubric category
+RUBRIC_FIELDS = {
+    "Communication Skills": "communication_skills",
+    "Local Knowledge": "local_knowledge",
+    "Enthusiasm & Engagement": "enthusiasm_engagement",
+    "Problem-Solving Ability": "problem_solving_ability",
+    "Traveler Interaction": "traveler_interaction",
+    "Bonus Score": "bonus_score",
+}
+
+_CATEGORY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "explanation": {"type": "string"},
+    },
+    "required": ["score", "explanation"],
+}
+
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "q1": {"type": "string"},
+        "q2": {"type": "string"},
+        "q3": {"type": "string"},
+        "rubric": {
+            "type": "object",
+            "properties": {field: _CATEGORY_SCHEMA for field in RUBRIC_FIELDS.values()},
+            "required": list(RUBRIC_FIELDS.values()),
+        },
+        "total_score": {"type": "integer"},
+    },
+    "required": ["q1", "q2", "q3", "rubric", "total_score"],
+}
+
+JSON_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": RESPONSE_SCHEMA,
+}
+
+
+class AnalysisResult:
+    # Parsed analysis; the sheet row and the on-screen markdown are both
+    # built from this, whichever parser produced it
+
+    __slots__ = ("q1", "q2", "q3", "q4", "scores", "explanations", "total_score", "source", "meta")
+
+    def __init__(self, q1="", q2="", q3="", q4="", scores=None, explanations=None, source="text", meta=None):
+        self.q1 = q1
+        self.q2 = q2
+        self.q3 = q3
+        self.q4 = q4
+        self.scores = scores or {key: "" for key in RUBRIC_KEYS}
+        self.explanations = explanations or {key: "" for key in RUBRIC_KEYS}
+        self.total_score = sum(int(v) for v in self.scores.values() if str(v).isdigit())
+        self.source = source
+        self.meta = dict(meta or {})
+
+    @classmethod
+    def from_json(cls, text):
+        try:
+            data = json.loads(text)
+            rubric = data["rubric"]
+            scores = {}
+            explanations = {}
+            for key, field in RUBRIC_FIELDS.items():
+                low = 0 if key == "Bonus Score" else 1
+                scores[key] = str(min(5, max(low, int(rubric[field]["score"]))))
+                explanations[key] = str(rubric[field]["explanation"]).strip()
+            result = cls(
+                str(data["q1"]).strip(),
+                str(data["q2"]).strip(),
+                str(data["q3"]).strip(),
+                scores=scores,
+                explanations=explanations,
+                source="json"
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Response does not match the analysis schema: {e}") from e
+        result.q4 = result.rubric_markdown()
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["q1"], data["q2"], data["q3"], data["q4"], data["scores"], data["explanations"], data.get("source", "text"), data.get("meta"))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def rubric_markdown(self):
+        blocks = [
+            f"**{key}**  \nScore: {self.scores[key]}/5  \nExplanation: {self.explanations[key]}"
+            for key in RUBRIC_KEYS
+        ]
+        blocks.append(f"**Total Score out of 30:** {self.total_score}")
+        return "\n\n".join(blocks)
+
+    def to_markdown(self):
+        return f"**Q1.** {self.q1}\n\n**Q2.** {self.q2}\n\n**Q3.** {self.q3}\n\n{self.q4}"
+
+    def to_row(self, timestamp, interviewer, candidate_name, transcript):
+        row = [
+            timestamp,
+            interviewer,
+            candidate_name,
+            transcript,
+            self.q1,
+            self.q2,
+            self.q3,
+            self.q4,
+        ]
+        for key in RUBRIC_KEYS:
+            row.append(self.scores.get(key, ""))
+            row.append(self.explanations.get(key, ""))
+        row.append(self.total_score)
+        row.extend(self.meta.get(column, "") for column in META_COLUMNS)
+        return row
+
+
+def transcript_id(transcript):
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()[:12]
+
+
+def analysis_key(candidate_name, interviewer, transcript):
+    # Same candidate, interviewer and transcript (ignoring case and
+    # whitespace) means the same analysis, however often it's submitted
+    names = f"{candidate_name.strip().casefold()}|{interviewer.strip().casefold()}"
+    text = " ".join(transcript.casefold().split())
+    return hashlib.sha256(f"{names}|{transcript_id(text)}".encode("utf-8")).hexdigest()[:16]
+
+
+def split_transcript(transcript):
+    # Google Sheets caps a cell at 50,000 characters. Rather than truncating,
+    # long transcripts keep their first part in the main row and are stored
+    # in full, in cell-sized parts, on the overflow worksheet.
+    if len(transcript) <= MAX_CELL_SIZE:
+        return transcript, []
+
+    tid = transcript_id(transcript)
+    parts = [transcript[i:i + MAX_CELL_SIZE] for i in range(0, len(transcript), MAX_CELL_SIZE)]
+    overflow_rows = [[tid, n, len(parts), part] for n, part in enumerate(parts, start=1)]
+    note = f"\n...[Transcript continues in the '{OVERFLOW_SHEET_NAME}' sheet, id {tid}, {len(parts)} parts]"
+    return parts[0] + note, overflow_rows
+
+
+def join_transcript(overflow_rows):
+    # Inverse of split_transcript for rows read back from the overflow sheet
+    parts = sorted(overflow_rows, key=lambda r: int(r[1]))
+    return "".join(r[3] for r in parts)
+
+
+# ----------------------------
+# Streaming
+# ----------------------------
+class IncrementalParser:
+    # Fed the response chunk by chunk; reports each Q answer and rubric score
+    # as soon as the section after it has started.
+
+    def __init__(self):
+        self.text = ""
+        self.answers = {}
+        self.scores = {}
+
+    def _completed_answers(self):
+        done = {}
+        if "Q1" not in self.answers and Q2_MARKER in self.text:
+            done["Q1"] = extract_section(Q1_MARKER, Q2_MARKER, self.text)
+        if "Q2" not in self.answers and Q3_MARKER in self.text:
+            done["Q2"] = extract_section(Q2_MARKER, Q3_MARKER, self.text)
+        if "Q3" not in self.answers:
+            marker = next((m for m in RUBRIC_MARKERS if m in self.text), None)
+            if marker:
+                done["Q3"] = extract_section(Q3_MARKER, marker, self.text)
+        return done
+
+    def _completed_scores(self, patterns):
+        done = {}
+        for key in RUBRIC_KEYS:
+            if key in self.scores:
+                continue
+            match = patterns[key].search(self.text)
+            if match:
+                done[key] = match.group(1).strip()
+        return done
+
+    def feed(self, chunk):
+        self.text += chunk
+        answers = self._completed_answers()
+        scores = self._completed_scores(PARTIAL_SCORE_PATTERNS)
+        self.answers.update(answers)
+        self.scores.update(scores)
+        return answers, scores
+
+    def finish(self):
+        scores = self._completed_scores(SCORE_PATTERNS)
+        self.scores.update(scores)
+        return parse_response(self.text)
+
+
+def stream_response(model, prompt, trace=None, meta=None):
+    # meta, if given, is filled in with the model and retry count (see gemini_client.call_meta)
+    stream = model.generate_content(prompt, stream=True)
+    if meta is not None:
+        meta.update(gemini_client.call_meta(stream))
+    for chunk in stream:
+        if trace:
+            trace.capture(chunk)
+        # Chunks with no text parts (e.g. a trailing finish-reason chunk)
+        # raise on .text instead of returning ""
+        try:
+            text = chunk.text
+        except ValueError:
+            continue
+        if text:
+            yield text
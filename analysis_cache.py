@@ -0,0 +1,97 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+import config
+
+# ----------------------------
+# Analysis Cache
+# ----------------------------
+# Content-addressed store of Gemini responses, so re-submitting the same
+# transcript (or fixing a typo in the interviewer name) doesn't pay for
+# another gemini-2.5-pro call. Oldest-used entries are evicted once the
+# cache grows past MAX_ENTRIES or MAX_BYTES.
+
+MAX_ENTRIES = 500
+MAX_BYTES = 50 * 1024 * 1024
+
+
+def normalize_transcript(transcript):
+    text = transcript.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    return text.strip()
+
+
+def cache_key(transcript, candidate_name, model_name, prompt_version):
+    parts = [
+        normalize_transcript(transcript),
+        candidate_name.strip().casefold(),
+        model_name,
+        prompt_version,
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, path=None, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or config.data_path("analysis_cache.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS analyses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                parsed TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_last_used ON analyses (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, parsed FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return {"response": row[0], "parsed": json.loads(row[1])}
+
+    def put(self, key, response, parsed):
+        parsed_json = json.dumps(parsed)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, parsed_json, len(response) + len(parsed_json), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analyses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from least recently used and drop until we're back under both limits
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM analyses ORDER BY last_used"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM analyses WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM analyses")
+            self._conn.commit()
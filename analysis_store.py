@@ -0,0 +1,271 @@
+import re
+import sqlite3
+import threading
+
+import analysis
+import archive
+import config
+
+# ----------------------------
+# Local Analysis Store
+# ----------------------------
+# A searchable copy of every interview row written to the sheet, kept in a
+# local SQLite file. Rows are indexed by candidate, interviewer, day and
+# total score, and transcripts plus the AI answers go into an FTS5 table,
+# so the history page never has to read the sheet. Rows are keyed on the
+# Analysis Key, so a re-submitted interview updates its row like it does on
+# the sheet. The sheet stays the source of truth; backfill() rebuilds the
+# store from it.
+
+# Positions in the sheet row built by AnalysisResult.to_row
+TIMESTAMP, INTERVIEWER, CANDIDATE, TRANSCRIPT = 0, 1, 2, 3
+ANSWERS = slice(4, 8)
+TOTAL = 8 + 2 * len(analysis.RUBRIC_KEYS)
+PROMPT_VERSION = TOTAL + 1 + analysis.META_COLUMNS.index("Prompt Version")
+ANALYSIS_KEY = analysis.ANALYSIS_KEY_COLUMN
+
+# The note split_transcript leaves in the main cell of a long transcript
+OVERFLOW_NOTE = re.compile(r"\n\.\.\.\[Transcript continues in the '.*' sheet, id (\w+), \d+ parts\]$")
+
+MAX_RESULTS = 200
+
+
+def _cell(row, index, default=""):
+    return row[index] if index < len(row) else default
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def row_key(row, transcript):
+    # Rows written before the Analysis Key column get theirs worked out
+    return _cell(row, ANALYSIS_KEY) or analysis.analysis_key(row[CANDIDATE], row[INTERVIEWER], transcript)
+
+
+def fts_query(text):
+    # Quote each word so user input can't trip over FTS5 syntax; the last
+    # word is a prefix match so results show up while typing
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class AnalysisStore:
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or config.data_path("analyses.sqlite"), check_same_thread=False)
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                day TEXT NOT NULL,
+                interviewer TEXT NOT NULL,
+                candidate TEXT NOT NULL,
+                transcript TEXT NOT NULL,
+                q1 TEXT,
+                q2 TEXT,
+                q3 TEXT,
+                q4 TEXT,
+                total_score INTEGER,
+                prompt_version TEXT,
+                analysis_key TEXT
+            );
+            CREATE INDEX IF NOT EXISTS analyses_candidate ON analyses (candidate COLLATE NOCASE, day);
+            CREATE INDEX IF NOT EXISTS analyses_interviewer ON analyses (interviewer COLLATE NOCASE, day);
+            CREATE INDEX IF NOT EXISTS analyses_day ON analyses (day);
+            CREATE INDEX IF NOT EXISTS analyses_score ON analyses (total_score);
+            CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5 (
+                candidate, interviewer, transcript, answers,
+                content='', tokenize='unicode61 remove_diacritics 2'
+            );"""
+        )
+        self._add_keys()
+
+    def _add_keys(self):
+        # Stores from before the Analysis Key get the column, filled in from
+        # the stored transcripts. Of older duplicates only the newest row
+        # gets the key; the rest keep NULL, which the unique index allows.
+        columns = [c[1] for c in self._conn.execute("PRAGMA table_info(analyses)")]
+        if "analysis_key" not in columns:
+            self._conn.execute("ALTER TABLE analyses ADD COLUMN analysis_key TEXT")
+        missing = self._conn.execute(
+            "SELECT id, candidate, interviewer, transcript FROM analyses WHERE analysis_key IS NULL "
+            "ORDER BY timestamp DESC"
+        ).fetchall()
+        taken = {k for (k,) in self._conn.execute("SELECT analysis_key FROM analyses WHERE analysis_key IS NOT NULL")}
+        updates = []
+        for analysis_id, candidate, interviewer, transcript in missing:
+            key = analysis.analysis_key(candidate, interviewer, transcript)
+            if key not in taken:
+                taken.add(key)
+                updates.append((key, analysis_id))
+        self._conn.executemany("UPDATE analyses SET analysis_key = ? WHERE id = ?", updates)
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS analyses_key ON analyses (analysis_key)")
+        self._conn.commit()
+
+    # ---- writes ----
+    def _insert(self, row, transcript):
+        # Upsert on the Analysis Key; returns whether anything changed
+        key = row_key(row, transcript)
+        values = (
+            str(row[TIMESTAMP]),
+            str(row[TIMESTAMP])[:10],
+            row[INTERVIEWER],
+            row[CANDIDATE],
+            transcript,
+            *row[ANSWERS],
+            _int(_cell(row, TOTAL)),
+            _cell(row, PROMPT_VERSION),
+        )
+        found = self._conn.execute(
+            "SELECT id, timestamp, day, interviewer, candidate, transcript, q1, q2, q3, q4, total_score, prompt_version "
+            "FROM analyses WHERE analysis_key = ?",
+            (key,)
+        ).fetchone()
+        if found and found[1:] == values:
+            return False  # already stored
+        if found:
+            # Contentless FTS rows are removed by repeating what was indexed
+            self._conn.execute(
+                "INSERT INTO analyses_fts (analyses_fts, rowid, candidate, interviewer, transcript, answers) "
+                "VALUES ('delete', ?, ?, ?, ?, ?)",
+                (found[0], found[4], found[3], found[5], "\n\n".join(q or "" for q in found[6:10]))
+            )
+            self._conn.execute(
+                "UPDATE analyses SET timestamp = ?, day = ?, interviewer = ?, candidate = ?, transcript = ?, q1 = ?, "
+                "q2 = ?, q3 = ?, q4 = ?, total_score = ?, prompt_version = ? WHERE id = ?",
+                (*values, found[0])
+            )
+            rowid = found[0]
+        else:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO analyses (timestamp, day, interviewer, candidate, transcript, q1, q2, q3, q4, "
+                "total_score, prompt_version, analysis_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*values, key)
+            )
+            if not cursor.rowcount:
+                return False
+            rowid = cursor.lastrowid
+        self._conn.execute(
+            "INSERT INTO analyses_fts (rowid, candidate, interviewer, transcript, answers) VALUES (?, ?, ?, ?, ?)",
+            (rowid, row[CANDIDATE], row[INTERVIEWER], transcript, "\n\n".join(row[ANSWERS]))
+        )
+        return True
+
+    def add(self, row, transcript=None):
+        # row is the sheet row; pass the full transcript when the row's cell
+        # was split onto the overflow sheet
+        with self._lock:
+            added = self._insert(row, transcript or row[TRANSCRIPT])
+            self._conn.commit()
+        return added
+
+    def add_many(self, rows):
+        # rows are (sheet row, full transcript) pairs
+        with self._lock:
+            added = sum(self._insert(row, transcript) for row, transcript in rows)
+            self._conn.commit()
+        return added
+
+    # ---- reads ----
+    def _query(self, sql, args=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, args)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def search(self, text="", candidate=None, interviewer=None, date_from=None, date_to=None, min_score=None,
+               limit=MAX_RESULTS):
+        where, args = [], []
+        match = fts_query(text)
+        if match:
+            where.append("a.id IN (SELECT rowid FROM analyses_fts WHERE analyses_fts MATCH ?)")
+            args.append(match)
+        if candidate:
+            where.append("a.candidate = ? COLLATE NOCASE")
+            args.append(candidate)
+        if interviewer:
+            where.append("a.interviewer = ? COLLATE NOCASE")
+            args.append(interviewer)
+        if date_from:
+            where.append("a.day >= ?")
+            args.append(str(date_from))
+        if date_to:
+            where.append("a.day <= ?")
+            args.append(str(date_to))
+        if min_score:
+            where.append("a.total_score >= ?")
+            args.append(min_score)
+        sql = "SELECT a.id, a.timestamp, a.interviewer, a.candidate, a.total_score FROM analyses a"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY a.timestamp DESC LIMIT ?"
+        return self._query(sql, (*args, limit))
+
+    def get(self, analysis_id):
+        rows = self._query("SELECT * FROM analyses WHERE id = ?", (analysis_id,))
+        return rows[0] if rows else None
+
+    def history(self, candidate):
+        return self._query(
+            "SELECT id, timestamp, day, interviewer, total_score, prompt_version FROM analyses "
+            "WHERE candidate = ? COLLATE NOCASE ORDER BY timestamp",
+            (candidate,)
+        )
+
+    def candidates(self):
+        return [r["candidate"] for r in self._query(
+            "SELECT DISTINCT candidate FROM analyses ORDER BY candidate COLLATE NOCASE"
+        )]
+
+    def interviewers(self):
+        return [r["interviewer"] for r in self._query(
+            "SELECT DISTINCT interviewer FROM analyses ORDER BY interviewer COLLATE NOCASE"
+        )]
+
+    def page(self, after_id=0, limit=100):
+        # Full records in id order, for jobs that walk the whole store
+        return self._query("SELECT * FROM analyses WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit))
+
+    def answers(self):
+        # Every stored analysis without its transcript, oldest first
+        return self._query(
+            "SELECT analysis_key, timestamp, interviewer, candidate, q1, q2, q3, q4, total_score FROM analyses "
+            "ORDER BY timestamp"
+        )
+
+    def count(self):
+        return self._query("SELECT COUNT(*) AS n FROM analyses")[0]["n"]
+
+
+def backfill(store, sheet_values, overflow_values=()):
+    # sheet_values / overflow_values are get_all_values() of the interview and
+    # overflow worksheets, header rows included. Rows whose archived text
+    # couldn't be found are skipped rather than stored as references.
+    # Returns (added, skipped).
+    parts = {}
+    for row in overflow_values[1:]:
+        if len(row) >= 4:
+            parts.setdefault(row[0], []).append(row)
+
+    rows = []
+    skipped = 0
+    for row in sheet_values[1:]:
+        if len(row) <= TOTAL or not row[TIMESTAMP] or not row[CANDIDATE]:
+            continue
+        if any(archive.REFERENCE_PATTERN.match(str(_cell(row, i))) for i in archive.OFFLOADED.values()):
+            skipped += 1
+            continue
+        transcript = row[TRANSCRIPT]
+        note = OVERFLOW_NOTE.search(transcript)
+        if note and note.group(1) in parts:
+            transcript = analysis.join_transcript(parts[note.group(1)])
+        rows.append((row, transcript))
+    return store.add_many(rows), skipped
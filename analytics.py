@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+import analysis
+
+# ----------------------------
+# Scoring Analytics
+# ----------------------------
+# Rubric scores as a DataFrame, with every statistic computed column-wise
+# in pandas/NumPy rather than row by row, so the dashboard stays responsive
+# with tens of thousands of interviews. Input rows are the dicts returned
+# by SheetReader.
+
+CATEGORIES = list(analysis.RUBRIC_KEYS)
+
+# Interviewers whose average z-score is this far from zero get flagged
+CALIBRATION_THRESHOLD = 0.5
+MIN_INTERVIEWS = 5
+
+# How the app writes timestamps to the sheet
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def to_frame(rows):
+    df = pd.DataFrame.from_records(rows, columns=["timestamp", "interviewer", "candidate", *CATEGORIES, "total_score"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
+    df[CATEGORIES + ["total_score"]] = df[CATEGORIES + ["total_score"]].apply(pd.to_numeric, errors="coerce")
+    df["interviewer"] = df["interviewer"].fillna("").str.strip()
+    return df.dropna(subset=["total_score"]).reset_index(drop=True)
+
+
+def zscores(df):
+    # Each category standardized against all interviews
+    scores = df[CATEGORIES].to_numpy(dtype=float)
+    mean = np.nanmean(scores, axis=0)
+    std = np.nanstd(scores, axis=0)
+    std[std == 0] = 1.0
+    return pd.DataFrame((scores - mean) / std, columns=CATEGORIES, index=df.index)
+
+
+def category_distribution(df):
+    scores = df[CATEGORIES]
+    counts = scores.apply(lambda col: col.value_counts()).reindex(range(6)).fillna(0).astype(int)
+    summary = scores.agg(["count", "mean", "std", "median"]).round(2)
+    table = pd.concat([summary, counts.rename(index=lambda s: f"scored {s}")])
+    return table.T.rename_axis("category").reset_index()
+
+
+def interviewer_distribution(df):
+    grouped = df.groupby("interviewer")
+    table = grouped[CATEGORIES].mean().round(2)
+    table.insert(0, "total_std", grouped["total_score"].std().round(2))
+    table.insert(0, "total_mean", grouped["total_score"].mean().round(2))
+    table.insert(0, "interviews", grouped.size())
+    return table.reset_index()
+
+
+def calibration(df, min_interviews=MIN_INTERVIEWS, threshold=CALIBRATION_THRESHOLD):
+    # Average z-score per interviewer: below zero scores harsher than the
+    # team, above zero more generously
+    z = zscores(df)
+    z["interviewer"] = df["interviewer"]
+    grouped = z.groupby("interviewer")
+    table = grouped[CATEGORIES].mean()
+    table.insert(0, "bias", table.mean(axis=1))
+    table.insert(0, "interviews", grouped.size())
+    table = table[table["interviews"] >= min_interviews]
+    table["verdict"] = np.select(
+        [table["bias"] <= -threshold, table["bias"] >= threshold],
+        ["harsh", "generous"],
+        default="in line"
+    )
+    return table.round(2).sort_values("bias").reset_index()
+
+
+def normalized_scores(df):
+    # Each interview's totals next to a version with the interviewer's bias
+    # (in points) removed, for comparing Lokafyers seen by different people
+    bias = df["total_score"] - df.groupby("interviewer")["total_score"].transform("mean")
+    out = df[["timestamp", "interviewer", "candidate", "total_score"]].copy()
+    out["adjusted_total"] = (df["total_score"].mean() + bias).round(1)
+    out["total_z"] = ((df["total_score"] - df["total_score"].mean()) / (df["total_score"].std() or 1.0)).round(2)
+    return out
+
+
+def drift(df, freq="M"):
+    # Per-period category averages plus the spread between interviewers'
+    # average totals; a widening spread means raters are drifting apart
+    dated = df.dropna(subset=["timestamp"])
+    period = dated["timestamp"].dt.to_period(freq).rename("period")
+    categories = dated.groupby(period)[CATEGORIES].mean()
+    per_rater = dated.groupby([period, dated["interviewer"]])["total_score"].mean().unstack()
+    categories["rater_spread"] = per_rater.std(axis=1)
+    categories["raters"] = per_rater.notna().sum(axis=1)
+    categories.index = categories.index.astype(str)
+    return categories.round(2).reset_index()
+
+
+def to_csv(frame):
+    return frame.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,271 @@
+import base64
+import contextlib
+import hashlib
+import re
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import analysis
+import config
+from sheet_reader import HEADER_ROWS, column_letter
+
+# ----------------------------
+# Sheet Archive
+# ----------------------------
+# Keeps the live interview sheet small. New rows go to the sheet with the
+# transcript and the long rubric write-up (Q4) swapped for a reference;
+# the text itself is zlib-compressed onto the "Text Archive" worksheet and
+# into a local SQLite copy that serves reads. rotate() moves rows older
+# than N days onto one worksheet per month in bulk, and read_rows() puts
+# everything back together, so callers see full rows wherever they live
+# (and only the latest row per Analysis Key).
+
+TEXT_ARCHIVE_SHEET_NAME = "Text Archive"
+TEXT_ARCHIVE_HEADER = ("Archive ID", "Column", "Part", "Total Parts", "Data")
+# Text archive rows are upserted on these columns: a re-submitted analysis
+# overwrites its parts, and parts left over from a longer old version no
+# longer add up to a whole text
+TEXT_ARCHIVE_KEY = (0, 1, 2)
+MONTH_SHEET_PREFIX = "Archive "
+ROTATE_BATCH = 500
+
+# Sheet row positions (see AnalysisResult.to_row) whose text is offloaded
+OFFLOADED = {"Transcript": 3, "Q4": 7}
+# Columns in a full row, for sheets whose header row is shorter
+ROW_WIDTH = 8 + 2 * len(analysis.RUBRIC_KEYS) + 1 + len(analysis.META_COLUMNS)
+REFERENCE = "[archived {}]"
+REFERENCE_PATTERN = re.compile(r"^\[archived (\w+)\]$")
+
+DAY_FORMATS = ("%Y-%m-%d", "%m/%d/%Y")
+
+
+def archive_id(row):
+    # The Analysis Key, so a re-submitted interview replaces its texts
+    key_column = analysis.ANALYSIS_KEY_COLUMN
+    if key_column < len(row) and row[key_column]:
+        return str(row[key_column])
+    key = f"{row[0]}|{row[1]}|{row[2]}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def encode(text):
+    # Compressed, then base64 so it fits in a cell; split like long transcripts
+    data = base64.b64encode(zlib.compress(text.encode("utf-8"), 9)).decode("ascii")
+    size = analysis.MAX_CELL_SIZE
+    return [data[i:i + size] for i in range(0, len(data), size)] or [""]
+
+
+def offload(row):
+    # Returns (row for the live sheet, rows for the text archive sheet)
+    aid = archive_id(row)
+    sheet_row = list(row)
+    archive_rows = []
+    for column, index in OFFLOADED.items():
+        text = str(row[index]) if index < len(row) else ""
+        if not text:
+            continue
+        parts = encode(text)
+        archive_rows.extend([aid, column, n, len(parts), part] for n, part in enumerate(parts, start=1))
+        sheet_row[index] = REFERENCE.format(aid)
+    return sheet_row, archive_rows
+
+
+def for_sheet(row, offload_text=None):
+    # row is the full AnalysisResult.to_row; returns (sheet row, text archive
+    # rows, overflow rows). With offloading off, long transcripts spill over
+    # onto the overflow sheet as before.
+    if config.OFFLOAD_TEXT if offload_text is None else offload_text:
+        sheet_row, archive_rows = offload(row)
+        return sheet_row, archive_rows, []
+    transcript_cell, overflow_rows = analysis.split_transcript(row[OFFLOADED["Transcript"]])
+    sheet_row = list(row)
+    sheet_row[OFFLOADED["Transcript"]] = transcript_cell
+    return sheet_row, [], overflow_rows
+
+
+# ---- local copy ----
+class TextArchive:
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or config.data_path("text_archive.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS texts (
+                archive_id TEXT NOT NULL,
+                col TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (archive_id, col)
+            )"""
+        )
+
+    def add_rows(self, archive_rows, replace=True):
+        # archive_rows as written to the text archive sheet, oldest first.
+        # Per text the newest complete version wins; texts with a part
+        # missing are skipped. With replace off, texts already stored locally
+        # are kept (they may be newer than a sheet still being written).
+        texts = {}
+        for n, (aid, column, part, total, data) in enumerate(row[:5] for row in archive_rows if len(row) >= 5):
+            version = texts.setdefault((aid, column, int(total)), {"parts": {}, "last": n})
+            version["parts"][int(part)] = data
+            version["last"] = n
+        newest = {}
+        for (aid, column, total), version in texts.items():
+            complete = all(n in version["parts"] for n in range(1, total + 1))
+            if complete and version["last"] >= newest.get((aid, column), (-1, None))[0]:
+                newest[(aid, column)] = (version["last"], "".join(version["parts"][n] for n in range(1, total + 1)))
+        values = [(aid, column, base64.b64decode(data)) for (aid, column), (_, data) in newest.items()]
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock:
+            self._conn.executemany(f"{verb} INTO texts (archive_id, col, data) VALUES (?, ?, ?)", values)
+            self._conn.commit()
+        return len(values)
+
+    def get(self, aid, column):
+        with self._lock:
+            found = self._conn.execute("SELECT data FROM texts WHERE archive_id = ? AND col = ?", (aid, column)).fetchone()
+        return zlib.decompress(found[0]).decode("utf-8") if found else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT archive_id) FROM texts").fetchone()[0]
+
+
+def resolve(rows, text_archive, fetch_text_archive=None):
+    # Swap references back for their text. Anything not in the local copy
+    # triggers one read of the text archive sheet (fetch_text_archive
+    # returns its get_all_values()); still-missing text keeps the reference.
+    resolved = []
+    missing = False
+    for row in rows:
+        row = list(row)
+        for column, index in OFFLOADED.items():
+            match = REFERENCE_PATTERN.match(str(row[index])) if index < len(row) else None
+            if match:
+                text = text_archive.get(match.group(1), column)
+                if text is None:
+                    missing = True
+                else:
+                    row[index] = text
+        resolved.append(row)
+    if missing and fetch_text_archive:
+        text_archive.add_rows(fetch_text_archive()[HEADER_ROWS:], replace=False)
+        return resolve(resolved, text_archive)
+    return resolved
+
+
+def read_rows(sheet_values, text_archive, fetch_text_archive=None):
+    # sheet_values: get_all_values() of each month archive, oldest first,
+    # then the live sheet. Returns every data row with its text restored;
+    # of rows sharing an Analysis Key only the last one is kept.
+    rows = [row for values in sheet_values for row in values[HEADER_ROWS:] if any(row)]
+    key_column = analysis.ANALYSIS_KEY_COLUMN
+    last = {row[key_column]: n for n, row in enumerate(rows) if key_column < len(row) and row[key_column]}
+    rows = [row for n, row in enumerate(rows)
+            if not (key_column < len(row) and row[key_column]) or last[row[key_column]] == n]
+    return resolve(rows, text_archive, fetch_text_archive)
+
+
+# ---- rotation ----
+def _day(value):
+    token = str(value).split(" ")[0]
+    for fmt in DAY_FORMATS:
+        try:
+            return datetime.strptime(token, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def month_title(day):
+    return f"{MONTH_SHEET_PREFIX}{day:%Y-%m}"
+
+
+def _row_key(row):
+    return tuple(str(cell) for cell in row[:3])
+
+
+def _runs(numbers):
+    # Sorted row numbers as (first, last) runs of consecutive rows
+    runs = []
+    for n in numbers:
+        if runs and runs[-1][1] == n - 1:
+            runs[-1][1] = n
+        else:
+            runs.append([n, n])
+    return runs
+
+
+def _stamps(sheet):
+    # {row number: (timestamp, analysis key)} for every data row
+    key_letter = column_letter(analysis.ANALYSIS_KEY_COLUMN)
+    stamps, keys = sheet.batch_get([f"A{HEADER_ROWS + 1}:A", f"{key_letter}{HEADER_ROWS + 1}:{key_letter}"])
+    keys = list(keys) + [[]] * (len(stamps) - len(keys))
+    return {
+        n: (cells[0] if cells else "", key[0] if key else "")
+        for n, (cells, key) in enumerate(zip(stamps, keys), start=HEADER_ROWS + 1)
+    }
+
+
+def rotate(job, live_sheet, month_sheet, reader, days=None, batch_size=ROTATE_BATCH, today=None, on_moved=None,
+           hold=None):
+    # Run through JobRunner. Moves rows of the live sheet dated more than
+    # `days` ago onto per-month worksheets (month_sheet(title, header) opens
+    # or creates one), batch_size rows per read and append, then deletes
+    # them from the live sheet. Rows are picked by date, not position: an
+    # upsert can rewrite an old row in place with a new timestamp.
+    #
+    # hold() is a context manager that keeps the sheet writer from flushing;
+    # under it each row's timestamp and key are read again and only rows
+    # that haven't changed since they were copied are deleted, then
+    # on_moved(count) runs. A row changed in between stays live; its copy on
+    # the month sheet is superseded (read_rows keeps the latest per key).
+    # Rows already on a month sheet are skipped, so a cancelled or failed
+    # run can simply be started again.
+    days = config.ARCHIVE_AFTER_DAYS if days is None else days
+    today = today or datetime.now(timezone(timedelta(hours=8))).date()
+    cutoff = today - timedelta(days=days)
+    hold = hold or contextlib.nullcontext
+
+    job.update(progress="Reading timestamps...")
+    selected = {n: stamp for n, stamp in _stamps(live_sheet).items()
+                if _day(stamp[0]) is not None and _day(stamp[0]) < cutoff}
+    if not selected:
+        return {"moved": 0, "months": [], "changed": 0}
+    numbers = sorted(selected)
+
+    header = live_sheet.row_values(1)
+    last_column = column_letter(max(len(header), ROW_WIDTH) - 1)
+    existing = {}
+    for start in range(0, len(numbers), batch_size):
+        job.check()
+        chunk = numbers[start:start + batch_size]
+        ranges = [f"A{first}:{last_column}{last}" for first, last in _runs(chunk)]
+        by_month = {}
+        for row in (row for values in live_sheet.batch_get(ranges) for row in values):
+            by_month.setdefault(month_title(_day(row[0])), []).append(row)
+        for title, rows in by_month.items():
+            sheet = month_sheet(title, header)
+            if title not in existing:
+                existing[title] = {_row_key(row) for row in sheet.batch_get([f"A{HEADER_ROWS + 1}:C"])[0]}
+            new_rows = [row for row in rows if _row_key(row) not in existing[title]]
+            if new_rows:
+                sheet.append_rows(new_rows)
+                existing[title].update(_row_key(row) for row in new_rows)
+        job.update(progress=f"Copied {start + len(chunk):,} of {len(numbers):,} rows to the month archives...")
+
+    job.check()
+    job.update(progress=f"Removing {len(numbers):,} rows from the live sheet...")
+    with hold():
+        current = _stamps(live_sheet)
+        unchanged = [n for n in numbers if current.get(n) == selected[n]]
+
+        def delete():
+            # Bottom up, so the row numbers of the runs still to go hold
+            for first, last in reversed(_runs(unchanged)):
+                live_sheet.delete_rows(first, last)
+
+        reader.remove_rows(unchanged, delete)
+        if on_moved:
+            on_moved(len(unchanged))
+    return {"moved": len(unchanged), "months": sorted(existing), "changed": len(numbers) - len(unchanged)}
@@ -0,0 +1,253 @@
+import csv
+import io
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+import analysis
+import analysis_cache
+import archive
+import chunking
+import gemini_client
+import metrics
+import preprocess
+
+# ----------------------------
+# Batch Analysis
+# ----------------------------
+# Interview days produce 20-40 transcripts at once. These helpers turn a
+# folder, zip or multi-file upload plus a names CSV into work items and fan
+# the Gemini calls out over a small thread pool that respects a per-minute
+# request budget. Retries and backoff on 429s are the ResilientModel's; the
+# budget is taken before each of its attempts.
+
+TRANSCRIPT_EXTENSIONS = (".txt", ".md", ".vtt", ".srt")
+MAX_WORKERS = 4
+REQUESTS_PER_MINUTE = 10
+
+FILE_COLUMNS = ("file", "filename", "transcript")
+INTERVIEWER_COLUMNS = ("interviewer", "interviewer name")
+CANDIDATE_COLUMNS = ("candidate", "candidate name", "lokafyer", "lokafyer name")
+
+
+def _stem(name):
+    return os.path.splitext(os.path.basename(name))[0].strip().lower()
+
+
+def _decode(data):
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def read_zip(data):
+    transcripts = {}
+    names_csv = None
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or os.path.basename(info.filename).startswith("."):
+                continue
+            lower = info.filename.lower()
+            if lower.endswith(".csv"):
+                names_csv = _decode(archive.read(info))
+            elif lower.endswith(TRANSCRIPT_EXTENSIONS):
+                transcripts[os.path.basename(info.filename)] = _decode(archive.read(info))
+    return transcripts, names_csv
+
+
+def read_uploads(files):
+    # Streamlit UploadedFile objects; zips are expanded in place
+    transcripts = {}
+    names_csv = None
+    for f in files:
+        lower = f.name.lower()
+        if lower.endswith(".zip"):
+            zipped, zipped_csv = read_zip(f.getvalue())
+            transcripts.update(zipped)
+            names_csv = zipped_csv or names_csv
+        elif lower.endswith(".csv"):
+            names_csv = _decode(f.getvalue())
+        elif lower.endswith(TRANSCRIPT_EXTENSIONS):
+            transcripts[f.name] = _decode(f.getvalue())
+    return transcripts, names_csv
+
+
+def read_folder(path):
+    transcripts = {}
+    names_csv = None
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if not os.path.isfile(full):
+            continue
+        with open(full, "rb") as fh:
+            data = fh.read()
+        if name.lower().endswith(".csv"):
+            names_csv = _decode(data)
+        elif name.lower().endswith(TRANSCRIPT_EXTENSIONS):
+            transcripts[name] = _decode(data)
+    return transcripts, names_csv
+
+
+def _pick(row, columns):
+    for column in columns:
+        if row.get(column):
+            return row[column].strip()
+    return ""
+
+
+def parse_names_csv(text):
+    # Expects a header with file, interviewer and candidate columns
+    names = {}
+    reader = csv.DictReader(io.StringIO(text))
+    for raw in reader:
+        row = {(k or "").strip().lower(): (v or "") for k, v in raw.items()}
+        file_name = _pick(row, FILE_COLUMNS)
+        if file_name:
+            names[_stem(file_name)] = (_pick(row, INTERVIEWER_COLUMNS), _pick(row, CANDIDATE_COLUMNS))
+    return names
+
+
+def new_item(file_name, interviewer, candidate_name, transcript):
+    return {
+        "file": file_name,
+        "interviewer": interviewer,
+        "candidate_name": candidate_name,
+        "transcript": transcript,
+        "status": "pending",
+        "attempts": 0,
+        "error": "",
+        "result": None,
+        "row": None,
+        "sheet_row": None,
+        "archive_rows": [],
+        "overflow_rows": [],
+        "tokens_saved": 0,
+    }
+
+
+def build_items(transcripts, names):
+    items = []
+    for file_name, transcript in sorted(transcripts.items()):
+        interviewer, candidate_name = names.get(_stem(file_name), ("", ""))
+        item = new_item(file_name, interviewer, candidate_name, transcript)
+        if not interviewer or not candidate_name:
+            item["status"] = "skipped"
+            item["error"] = "No interviewer/candidate in the names CSV"
+        elif not transcript.strip():
+            item["status"] = "skipped"
+            item["error"] = "Empty transcript"
+        items.append(item)
+    return items
+
+
+class RateLimiter:
+    # Sliding one-minute window shared by every worker thread
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= 60:
+                    self._calls.popleft()
+                if len(self._calls) < self.per_minute:
+                    self._calls.append(now)
+                    return
+                delay = 60 - (now - self._calls[0])
+            time.sleep(delay)
+
+
+def analyze_item(model, model_name, item, limiter, cache=None, structured=True, metrics_store=None,
+                 preprocessing=preprocess.DEFAULT_MODE, on_row=None):
+    # on_row(item) runs in the worker as soon as the item's row is built, so
+    # finished rows are saved even if the caller stops polling
+    trace = metrics.Trace("batch", model_name)
+    try:
+        _analyze_item(model, model_name, item, limiter, cache, structured, trace, preprocessing)
+        if on_row and item["row"]:
+            with trace.stage("sheet_enqueue"):
+                on_row(item)
+        return item
+    finally:
+        trace.extra["status"] = item["status"]
+        trace.extra["attempts"] = item["attempts"]
+        if metrics_store:
+            metrics_store.record(trace)
+
+
+def _analyze_item(model, model_name, item, limiter, cache, structured, trace, preprocessing):
+    with trace.stage("preprocess"):
+        prompt_transcript, cleanup = preprocess.preprocess(item["transcript"], preprocessing, item["interviewer"])
+    trace.extra["preprocessing"] = preprocessing
+    trace.extra["tokens_saved"] = cleanup["tokens_saved"]
+    item["tokens_saved"] = cleanup["tokens_saved"]
+
+    key = analysis_cache.cache_key(prompt_transcript, item["candidate_name"], model_name, analysis.prompt_version(structured))
+    with trace.stage("cache_lookup"):
+        cached = cache.get(key) if cache else None
+    trace.extra["cache_hit"] = bool(cached)
+
+    if cached:
+        response = cached["response"]
+        result = analysis.AnalysisResult.from_dict(cached["parsed"])
+        item["status"] = "cached"
+    else:
+        with trace.stage("prompt"):
+            prompt, prompt_info = chunking.prepare_prompt(model, item["candidate_name"], prompt_transcript, before_call=limiter.wait, structured=structured)
+        trace.extra["prompt_mode"] = prompt_info["mode"]
+        generation_config = analysis.JSON_GENERATION_CONFIG if structured else None
+
+        def before_attempt():
+            # Runs before every request the client sends, retries included
+            with trace.stage("rate_limit_wait"):
+                limiter.wait()
+            item["attempts"] += 1
+            item["status"] = "analyzing" if item["attempts"] == 1 else f"retry {item['attempts'] - 1}"
+
+        try:
+            with trace.stage("model"):
+                reply = model.generate_content(prompt, generation_config=generation_config, before_attempt=before_attempt)
+                response = reply.text
+            trace.capture(reply)
+        except Exception as e:
+            item["status"] = "failed"
+            item["error"] = str(e)
+            return item
+        with trace.stage("parse"):
+            result = analysis.parse_response(response, structured=structured)
+        result.meta.update(gemini_client.call_meta(reply))
+        # A fallback model's answer isn't cached under the main model's key
+        if cache and gemini_client.answered_by(result.meta, model_name):
+            cache.put(key, response, result.to_dict())
+        item["status"] = "done"
+    result.meta["Preprocessing"] = preprocessing
+    result.meta["Analysis Key"] = analysis.analysis_key(item["candidate_name"], item["interviewer"], item["transcript"])
+
+    with trace.stage("row"):
+        timestamp = datetime.now(timezone(timedelta(hours=8))).strftime("%Y-%m-%d %H:%M:%S")
+        item["result"] = result
+        item["row"] = result.to_row(timestamp, item["interviewer"], item["candidate_name"], item["transcript"])
+        item["sheet_row"], item["archive_rows"], item["overflow_rows"] = archive.for_sheet(item["row"])
+    return item
+
+
+def run_batch(model, model_name, items, max_workers=MAX_WORKERS, per_minute=REQUESTS_PER_MINUTE, cache=None, structured=True,
+              metrics_store=None, preprocessing=preprocess.DEFAULT_MODE, on_row=None):
+    # Returns futures immediately; callers poll the item dicts for progress
+    limiter = RateLimiter(per_minute)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+    futures = [
+        executor.submit(analyze_item, model, model_name, item, limiter, cache, structured, metrics_store, preprocessing, on_row)
+        for item in items if item["status"] == "pending"
+    ]
+    executor.shutdown(wait=False)
+    return futures
@@ -0,0 +1,78 @@
+import json
+import random
+
+import analysis
+
+# ----------------------------
+# Benchmark Corpus
+# ----------------------------
+# Either load recorded calls from a JSONL file (one object per line with
+# candidate_name, interviewer, transcript, response_text and optionally
+# response_json) or synthesize a deterministic corpus shaped like real
+# interviews: speaker-labelled turns and responses in the rubric format.
+
+NAMES = ["Amelia", "Bruno", "Chiara", "Dev", "Elif", "Farah", "Goran", "Hana", "Ines", "Jonas"]
+PLACES = ["the old harbour", "the flower market", "the cathedral steps", "the night bazaar", "the river walk", "the tram museum"]
+FILLER = [
+    "So yeah, um, I grew up near {place} and I still walk there most weekends.",
+    "I think travellers love {place} because you can taste the local snacks there.",
+    "If someone got lost I'd share my location and meet them at {place}.",
+    "My tour would start at {place}, then we'd loop back through the side streets.",
+    "Honestly I just like meeting people and showing them {place}.",
+]
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def _transcript(rng, name, turns):
+    lines = []
+    for i in range(turns):
+        if i % 2 == 0:
+            lines.append(f"Interviewer: Can you tell me more about that? ({i})")
+        else:
+            line = rng.choice(FILLER).format(place=rng.choice(PLACES))
+            lines.append(f"{name}: {line} {line}")
+    return "\n".join(lines)
+
+
+def _response(rng, name):
+    scores = {key: rng.randint(1, 5) for key in analysis.RUBRIC_KEYS}
+    scores["Bonus Score"] = rng.randint(0, 3)
+    blocks = [
+        f"**Q1.** What did we learn about {name} during the call?\n{name} grew up nearby and clearly loves {rng.choice(PLACES)}.",
+        f"**Q2.** Do you think they're ready to lead a tour soon?\nYes, they came across as ready after one shadow tour.",
+        f"**Q3.** What's {name}'s plan for the tour?\nStart at {rng.choice(PLACES)} and finish at {rng.choice(PLACES)}.",
+    ]
+    for key in analysis.RUBRIC_KEYS:
+        blocks.append(f"**{key}**  \nScore: {scores[key]}/5  \nExplanation: Solid examples given during the call.")
+    blocks.append(f"**Total Score out of 30:** {sum(scores.values())}")
+    response_json = {
+        "q1": f"{name} grew up nearby.",
+        "q2": "Ready after one shadow tour.",
+        "q3": f"Start at {rng.choice(PLACES)}.",
+        "rubric": {
+            field: {"score": scores[key], "explanation": "Solid examples given during the call."}
+            for key, field in analysis.RUBRIC_FIELDS.items()
+        },
+        "total_score": sum(scores.values()),
+    }
+    return "\n\n".join(blocks), json.dumps(response_json)
+
+
+def synthetic_corpus(size=20, seed=7, turns=(40, 400)):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        name = NAMES[i % len(NAMES)]
+        response_text, response_json = _response(rng, name)
+        corpus.append({
+            "candidate_name": name,
+            "interviewer": "Bench",
+            "transcript": _transcript(rng, name, rng.randint(*turns)),
+            "response_text": response_text,
+            "response_json": response_json,
+        })
+    return corpus
@@ -0,0 +1,228 @@
+import argparse
+import os
+import statistics
+import sys
+import threading
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analysis  # noqa: E402
+import archive  # noqa: E402
+import fakes  # noqa: E402
+import interview_job  # noqa: E402
+import jobs  # noqa: E402
+import preprocess  # noqa: E402
+import similarity  # noqa: E402
+from analysis_cache import AnalysisCache  # noqa: E402
+from analysis_store import AnalysisStore  # noqa: E402
+from bench.corpus import load_corpus, synthetic_corpus  # noqa: E402
+from gemini_client import ResilientModel  # noqa: E402
+from sheet_writer import SheetWriter  # noqa: E402
+
+# ----------------------------
+# Analyze Pipeline Benchmark
+# ----------------------------
+# Replays a corpus through interview_job.run, the same code the Analyze
+# button runs (preprocessing, prompt building, the resilient Gemini call,
+# parsing, row assembly, the queued sheet writes, the local store and the
+# similarity index), with in-process fakes for Gemini and Google Sheets and
+# temporary local stores. Reports p50/p95 per stage, as recorded in each
+# analysis's trace, plus throughput for N concurrent simulated sessions.
+#
+#   python bench/run_pipeline.py --sessions 8 --iterations 200 --model-latency 0.05
+
+STAGES = ("preprocess", "cache_lookup", "prompt", "model", "parse", "cache_store", "row", "sheet_enqueue", "store",
+          "embed", "sheet_flush", "total")
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def error(self, stage):
+        with self._lock:
+            self.errors[stage] += 1
+
+
+class TraceRecorder:
+    # Stands in for the MetricsStore: stage timings go to the timer
+    def __init__(self, timer):
+        self.timer = timer
+
+    def record(self, trace):
+        for stage, seconds in trace.stages.items():
+            self.timer.record(stage, seconds)
+        self.timer.record("total", trace.to_dict()["total_ms"] / 1000)
+
+
+class CorpusReplies:
+    # A corpus item's view of the shared model: its calls are answered with
+    # the item's recorded response (see fakes.FakeModel)
+
+    def __init__(self, model, item):
+        self.model = model
+        self.response = (item["response_text"], item.get("response_json"))
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def generate_content(self, prompt, **kwargs):
+        return self.model.generate_content(prompt, response=self.response, **kwargs)
+
+
+class BenchServices:
+    # The getters interview_job.run uses from services, backed by fakes and
+    # stores in a temporary directory. One instance is shared by every
+    # session, as the app's cached resources are.
+    MODEL_NAME = "models/fake-gemini"
+
+    def __init__(self, args, timer, directory):
+        self.args = args
+        self.timer = timer
+        self.directory = directory
+        self.sheets = {}
+        self._writers = {}
+        self._lock = threading.Lock()
+        self._cache = AnalysisCache(os.path.join(directory, "cache.sqlite"))
+        self._store = AnalysisStore(os.path.join(directory, "analyses.sqlite"))
+        self._text_archive = archive.TextArchive(os.path.join(directory, "text_archive.sqlite"))
+        self._index = similarity.EmbeddingIndex(directory=os.path.join(directory, "embeddings"))
+        self._metrics = TraceRecorder(timer)
+        self._models = {}
+
+    def get_model(self, model_name=MODEL_NAME):
+        # One per name for the whole run, like services.get_model, so breaker
+        # and hedge state carry over between analyses
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = ResilientModel(fakes.FakeModel(
+                    "",
+                    latency=self.args.model_latency,
+                    error_rate=self.args.model_error_rate,
+                    model_name=model_name
+                ))
+            return self._models[model_name]
+
+    def get_analysis_cache(self):
+        return self._cache
+
+    def get_analysis_store(self):
+        return self._store
+
+    def get_text_archive(self):
+        return self._text_archive
+
+    def get_similarity_index(self):
+        return self._index
+
+    def get_metrics_store(self):
+        return self._metrics
+
+    def get_sheet_writer(self, title=None):
+        with self._lock:
+            if title not in self._writers:
+                sheet = fakes.FakeWorksheet(latency=self.args.sheet_latency, error_rate=self.args.sheet_error_rate)
+                self.sheets[title] = sheet
+                self._writers[title] = SheetWriter(
+                    lambda: sheet,
+                    spool_path=os.path.join(self.directory, f"spool_{len(self._writers)}.jsonl"),
+                    on_flush=lambda rows, seconds, ok: self.timer.record("sheet_flush", seconds) if ok else self.timer.error("sheet_flush"),
+                    key_column={None: analysis.ANALYSIS_KEY_COLUMN, archive.TEXT_ARCHIVE_SHEET_NAME: archive.TEXT_ARCHIVE_KEY}.get(title)
+                )
+            return self._writers[title]
+
+    def get_text_archive_writer(self):
+        return self.get_sheet_writer(archive.TEXT_ARCHIVE_SHEET_NAME)
+
+    def get_overflow_writer(self):
+        return self.get_sheet_writer(analysis.OVERFLOW_SHEET_NAME)
+
+    def flush(self):
+        return all(writer.flush(timeout=120) for writer in list(self._writers.values()))
+
+    def close(self):
+        for model in self._models.values():
+            model.shutdown()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_once(item, args, env):
+    try:
+        interview_job.run(
+            jobs.Job(timeout=3600),
+            CorpusReplies(env.get_model(), item),
+            item["interviewer"],
+            item["candidate_name"],
+            item["transcript"],
+            structured=args.structured,
+            force=True,  # every iteration calls the model, like a new transcript would
+            preprocessing=args.preprocessing,
+            env=env
+        )
+    except fakes.FakeAPIError:
+        env.timer.error("model")
+
+
+def report(timer, wall, iterations, sessions):
+    print(f"{'stage':<14} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10} {'errors':>7}")
+    for stage in STAGES + tuple(sorted(set(timer.samples) - set(STAGES))):
+        values = timer.samples.get(stage, [])
+        mean = statistics.fmean(values) if values else 0.0
+        print(
+            f"{stage:<14} {len(values):>6} {percentile(values, 50) * 1000:>10.3f} "
+            f"{percentile(values, 95) * 1000:>10.3f} {mean * 1000:>10.3f} {timer.errors.get(stage, 0):>7}"
+        )
+    completed = len(timer.samples.get("total", []))
+    print(f"\n{completed}/{iterations} analyses in {wall:.2f}s with {sessions} sessions: {completed / wall:.1f} analyses/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Analyze pipeline against fake Gemini and Sheets backends.")
+    parser.add_argument("--corpus", help="JSONL of recorded transcripts and responses (default: synthetic)")
+    parser.add_argument("--corpus-size", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=1, help="concurrent simulated sessions")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="seconds per simulated Gemini call")
+    parser.add_argument("--model-error-rate", type=float, default=0.0)
+    parser.add_argument("--sheet-latency", type=float, default=0.0, help="seconds per simulated sheet call")
+    parser.add_argument("--sheet-error-rate", type=float, default=0.0)
+    parser.add_argument("--structured", action="store_true", help="benchmark the JSON output path")
+    parser.add_argument("--preprocessing", choices=preprocess.MODES, default=preprocess.DEFAULT_MODE)
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.corpus_size)
+    timer = StageTimer()
+    items = [corpus[i % len(corpus)] for i in range(args.iterations)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = BenchServices(args, timer, directory)
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+                list(executor.map(lambda item: run_once(item, args, env), items))
+            # Queued sheet writes are part of the run
+            env.flush()
+        finally:
+            env.close()
+        report(timer, time.perf_counter() - started, args.iterations, args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import re
+from datetime import datetime, timezone, timedelta
+
+import streamlit as st
+
+import analysis
+import gemini_client
+import metrics
+import services
+import templates
+
+# ----------------------------
+# Post-tour / Feedback Call Review
+# ----------------------------
+# The post-tour and feedback pages ask the same four questions and differ
+# only in title and the worksheet they save to, so both render from here.
+
+PROMPT_TEMPLATE = templates.load("post_tour")
+HEADER = ("Timestamp", "Interviewer", "Lokafyer", "Transcript", "Q1", "Q2", "Q3", "Q4", "Score", "Prompt Version", "Model", "Retries")
+
+
+def build_prompt(candidate_name, transcript):
+    return PROMPT_TEMPLATE.render(candidate_name=candidate_name, transcript=transcript)
+
+
+def parse_response(response):
+    answers = re.split(r"\*\*?\s*\d\.\s.*?\*\*?", response)
+
+    q1 = answers[1].strip() if len(answers) > 1 else ""
+    q2 = answers[2].strip() if len(answers) > 2 else ""
+    q3 = answers[3].strip() if len(answers) > 3 else ""
+    q4 = answers[4].strip() if len(answers) > 4 else ""
+
+    score_match = re.search(r"\b([1-5])\b(?:\s*/\s*5)?", q4)
+    score = score_match.group(1) if score_match else "N/A"
+    return q1, q2, q3, q4, score
+
+
+def render(title, worksheet_title, key):
+    # key namespaces the widgets so each page keeps its own inputs
+    fields = {name: f"{key}_{name}" for name in ("interviewer", "candidate_name", "transcript")}
+
+    def clear_all_fields():
+        for field in fields.values():
+            st.session_state[field] = ""
+
+    model, _ = services.get_services()
+
+    st.title(title)
+
+    st.text_input("👤 Interviewer's Name", key=fields["interviewer"])
+    st.text_input("🧍 Lokafyer's Name", key=fields["candidate_name"])
+    st.text_area("📝 Paste the call transcript", key=fields["transcript"])
+
+    col1, col2, col3 = st.columns([1, 4, 2])
+
+    with col1:
+        st.button("🧹 Clear", on_click=clear_all_fields, key=f"{key}_clear")
+
+    with col3:
+        analyze_clicked = st.button("🔍 Analyze Transcript", key=f"{key}_analyze")
+
+    if not analyze_clicked:
+        return
+
+    interviewer = st.session_state[fields["interviewer"]]
+    candidate_name = st.session_state[fields["candidate_name"]]
+    transcript = st.session_state[fields["transcript"]]
+    if not interviewer or not candidate_name or not transcript:
+        st.warning("Please fill in all fields.")
+        return
+
+    trace = metrics.Trace(key, services.MODEL_NAME)
+    with st.spinner("Analyzing transcript..."), trace.stage("model"):
+        reply = model.generate_content(build_prompt(candidate_name, transcript))
+        response = reply.text
+    trace.capture(reply)
+
+    st.subheader("🧠 AI Analysis")
+    st.write(response)
+
+    with st.expander("📋 Copy response"):
+        st.code(response, language=None)
+
+    with trace.stage("parse"):
+        q1, q2, q3, q4, score = parse_response(response)
+    timestamp = datetime.now(timezone(timedelta(hours=8))).strftime("%Y-%m-%d %H:%M:%S")
+    transcript_cell, overflow_rows = analysis.split_transcript(transcript)
+
+    services.get_sheet_writer(worksheet_title, HEADER).enqueue([
+        timestamp,
+        interviewer,
+        candidate_name,
+        transcript_cell,
+        q1,
+        q2,
+        q3,
+        q4,
+        score,
+        PROMPT_TEMPLATE.version_id,
+        *gemini_client.call_meta(reply).values()
+    ])
+    if overflow_rows:
+        services.get_overflow_writer().enqueue_many(overflow_rows)
+    services.get_metrics_store().record(trace)
+    st.success(f"✅ Queued for the '{worksheet_title}' sheet!")
+
+    st.markdown("📄 [View Interview Sheet on Google Sheets](https://docs.google.com/spreadsheets/d/1bHODbSJmSZpl3iXPovuUDVTFrWph5xwP426OOHvWr08/edit?usp=sharing)")
@@ -0,0 +1,96 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import analysis
+import templates
+
+# ----------------------------
+# Chunked (map-reduce) Analysis
+# ----------------------------
+# Multi-hour calls are too slow (or too big) to send in one prompt. Long
+# transcripts are split on speaker turns, each chunk is boiled down to
+# evidence notes in parallel, and the usual rubric prompt is then run over
+# the combined notes so the response format (and parsing) stays the same.
+
+SINGLE_SHOT_TOKEN_LIMIT = 60000
+CHUNK_TOKENS = 15000
+CHARS_PER_TOKEN = 4
+MAX_PARALLEL_CHUNKS = 4
+EVIDENCE_TEMPLATE = templates.load("evidence")
+
+# "Name:" / "Name (00:01:02):" / "[00:01:02] Name:" at the start of a line
+SPEAKER_TURN = re.compile(r"^(?=(?:\[?\d{1,2}:\d{2}(?::\d{2})?\]?\s*)?[A-Z][\w .'\-]{0,40}(?:\s*\([\d:]+\))?:\s)", re.MULTILINE)
+
+
+def count_tokens(model, text):
+    # Anything shorter than the limit in characters can't be over it in
+    # tokens, so skip the count_tokens round-trip for ordinary calls
+    if len(text) < SINGLE_SHOT_TOKEN_LIMIT:
+        return len(text) // CHARS_PER_TOKEN
+    try:
+        return model.count_tokens(text).total_tokens
+    except Exception:
+        return len(text) // CHARS_PER_TOKEN
+
+
+def split_turns(transcript):
+    turns = [t for t in SPEAKER_TURN.split(transcript) if t.strip()]
+    if len(turns) > 1:
+        return turns
+    # No speaker labels: fall back to paragraphs
+    return [p + "\n\n" for p in re.split(r"\n\s*\n", transcript) if p.strip()]
+
+
+def chunk_turns(turns, max_chars=CHUNK_TOKENS * CHARS_PER_TOKEN):
+    chunks = []
+    current = ""
+    for turn in turns:
+        # A single monologue longer than a chunk gets hard-split
+        while len(turn) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(turn[:max_chars])
+            turn = turn[max_chars:]
+        if current and len(current) + len(turn) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += turn
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_evidence_prompt(candidate_name, chunk, index, total):
+    return EVIDENCE_TEMPLATE.render(candidate_name=candidate_name, chunk=chunk, index=index, total=total)
+
+
+def extract_evidence(model, candidate_name, transcript, before_call=None):
+    chunks = chunk_turns(split_turns(transcript))
+
+    def run(args):
+        # before_call runs before every request, retries included (e.g. the
+        # batch rate limiter)
+        index, chunk = args
+        prompt = build_evidence_prompt(candidate_name, chunk, index, len(chunks))
+        reply = model.generate_content(prompt, before_attempt=before_call) if before_call else model.generate_content(prompt)
+        return f"### Notes from part {index} of {len(chunks)}\n{reply.text.strip()}"
+
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_CHUNKS) as executor:
+        notes = list(executor.map(run, enumerate(chunks, start=1)))
+    return "\n\n".join(notes), len(chunks)
+
+
+def prepare_prompt(model, candidate_name, transcript, before_call=None, structured=False):
+    # Returns the rubric prompt to send plus how it was built
+    prompt = analysis.build_prompt(candidate_name, transcript, structured)
+    tokens = count_tokens(model, prompt)
+    if tokens <= SINGLE_SHOT_TOKEN_LIMIT:
+        return prompt, {"mode": "single", "tokens": tokens, "chunks": 1}
+
+    evidence, chunk_count = extract_evidence(model, candidate_name, transcript, before_call)
+    notes = (
+        "(The call was too long to include in full. Below are evidence notes "
+        "taken from each part of it, in order.)\n\n" + evidence
+    )
+    return analysis.build_prompt(candidate_name, notes, structured), {"mode": "chunked", "tokens": tokens, "chunks": chunk_count}
@@ -0,0 +1,37 @@
+import os
+
+# ----------------------------
+# Local settings
+# ----------------------------
+# Everything the app keeps on local disk (caches, spools, indexes) lives
+# under one directory so a deployment can point it at a persistent volume.
+DATA_DIR = os.environ.get("LOKAFY_DATA_DIR", ".lokafy")
+
+# Analyses run as background jobs; cap how many hit Gemini at once across
+# every session of this deployment, and how long one may take
+MAX_CONCURRENT_JOBS = int(os.environ.get("LOKAFY_MAX_JOBS", "4"))
+JOB_TIMEOUT = float(os.environ.get("LOKAFY_JOB_TIMEOUT", "300"))
+
+# Gemini calls: overall deadline per call, the cheaper model to fall back
+# to ("" for none), how many seconds the main model gets before the
+# fallback is asked as well (0 = only when the main model keeps failing),
+# and whether slow calls get a hedged duplicate after the recent p95
+GEMINI_DEADLINE = float(os.environ.get("LOKAFY_GEMINI_DEADLINE", "180"))
+FALLBACK_MODEL = os.environ.get("LOKAFY_FALLBACK_MODEL", "gemini-2.5-flash")
+FALLBACK_AFTER = float(os.environ.get("LOKAFY_FALLBACK_AFTER", "0"))
+HEDGE_REQUESTS = os.environ.get("LOKAFY_HEDGE_REQUESTS", "") == "1"
+
+# Embedding backend for the similar-candidates index: "hashing" runs
+# locally with no downloads, "gemini" uses Gemini's embedding API
+EMBEDDING_BACKEND = os.environ.get("LOKAFY_EMBEDDING_BACKEND", "hashing")
+
+# Sheet archiving: new rows keep only a reference to their transcript and
+# Q4 text (stored compressed on the "Text Archive" sheet), and rotation
+# moves rows older than this many days onto per-month archive sheets
+OFFLOAD_TEXT = os.environ.get("LOKAFY_OFFLOAD_TEXT", "1") == "1"
+ARCHIVE_AFTER_DAYS = int(os.environ.get("LOKAFY_ARCHIVE_AFTER_DAYS", "90"))
+
+
+def data_path(name):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
@@ -0,0 +1,107 @@
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import analysis
+import gemini_client
+
+# ----------------------------
+# Consensus Scoring
+# ----------------------------
+# One Gemini run gives noisy rubric scores. In consensus mode the same
+# prompt goes to several model/temperature configurations at once (so it
+# takes about as long as one call), each reply is parsed as usual, and
+# each category gets the median score. Categories where the runs disagree
+# a lot are flagged rather than hidden.
+
+# (model name, temperature); the first answer that parses is used for the
+# written answers and as the tie-breaker for explanations
+CONFIGS = [
+    ("gemini-2.5-pro", 0.2),
+    ("gemini-2.5-pro", 0.9),
+    ("gemini-2.5-flash", 0.5),
+]
+
+# A category is flagged when its runs spread this far apart
+DISAGREEMENT_RANGE = 2
+DISAGREEMENT_VARIANCE = 1.0
+
+
+def config_label(model_name, temperature):
+    return f"{gemini_client.short_name(model_name).replace('gemini-', '')}@{temperature:g}"
+
+
+def _run(model, prompt, structured, temperature):
+    generation_config = dict(analysis.JSON_GENERATION_CONFIG) if structured else {}
+    generation_config["temperature"] = temperature
+    reply = model.generate_content(prompt, generation_config=generation_config)
+    return reply, analysis.parse_response(reply.text, structured=structured)
+
+
+def _median_score(values):
+    # Half-way medians (e.g. 3.5 from four runs) round up
+    return int(statistics.median(values) + 0.5)
+
+
+def aggregate(results, labels):
+    # results: AnalysisResults in CONFIGS order; returns the consensus result
+    # and per-category stats
+    stats = {}
+    scores = {}
+    explanations = {}
+    for key in analysis.RUBRIC_KEYS:
+        runs = [(int(r.scores[key]), r) for r in results if str(r.scores.get(key, "")).isdigit()]
+        if not runs:
+            scores[key], explanations[key] = "", ""
+            continue
+        values = [value for value, _ in runs]
+        median = _median_score(values)
+        variance = statistics.pvariance(values)
+        # Explain with the first run that gave the consensus score, else the closest
+        _, chosen = min(runs, key=lambda run: abs(run[0] - median))
+        scores[key] = str(median)
+        explanations[key] = chosen.explanations.get(key, "")
+        stats[key] = {
+            "scores": values,
+            "variance": round(variance, 2),
+            "flagged": max(values) - min(values) >= DISAGREEMENT_RANGE or variance >= DISAGREEMENT_VARIANCE,
+        }
+
+    first = results[0]
+    result = analysis.AnalysisResult(first.q1, first.q2, first.q3, scores=scores, explanations=explanations,
+                                     source=first.source, meta=first.meta)
+    result.q4 = result.rubric_markdown()
+    flagged = [key for key, s in stats.items() if s["flagged"]]
+    result.meta["Consensus"] = ", ".join(labels)
+    result.meta["Score Variance"] = round(statistics.mean(s["variance"] for s in stats.values()), 2) if stats else ""
+    result.meta["High Disagreement"] = ", ".join(flagged)
+    return result, stats
+
+
+def score(get_model, prompt, structured=True, configs=None, before_call=None):
+    # get_model(name) returns a (resilient) model; all configs run in parallel
+    configs = configs or CONFIGS
+    with ThreadPoolExecutor(max_workers=len(configs), thread_name_prefix="consensus") as executor:
+        futures = []
+        for model_name, temperature in configs:
+            if before_call:
+                before_call()
+            futures.append(executor.submit(_run, get_model(model_name), prompt, structured, temperature))
+
+    replies, results, labels, errors = [], [], [], []
+    for (model_name, temperature), future in zip(configs, futures):
+        try:
+            reply, result = future.result()
+        except Exception as e:
+            errors.append(f"{config_label(model_name, temperature)}: {e}")
+            continue
+        replies.append(reply)
+        results.append(result)
+        labels.append(config_label(model_name, temperature))
+    if not results:
+        raise RuntimeError("Every consensus run failed: " + "; ".join(errors))
+
+    result, stats = aggregate(results, labels)
+    calls = [gemini_client.call_meta(reply) for reply in replies]
+    result.meta["Model"] = ", ".join(dict.fromkeys(c["Model"] for c in calls if c["Model"]))
+    result.meta["Retries"] = sum(c["Retries"] for c in calls)
+    return result, replies, stats, errors
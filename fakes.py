@@ -0,0 +1,180 @@
+import random
+import re
+import threading
+import time
+
+# ----------------------------
+# Offline stand-ins
+# ----------------------------
+# In-process replacements for the Google services, for trying things out
+# and benchmarking without credentials or quota. Latencies are in seconds
+# and error rates are the fraction of calls that fail.
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code, message="Fake API error"):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _sleep(latency, jitter):
+    if latency:
+        time.sleep(max(0.0, random.gauss(latency, latency * jitter)))
+
+
+class FakeWorksheet:
+    # Mimics the parts of gspread.Worksheet the app uses. fail_next makes the
+    # next N write calls raise a 429, like the Sheets per-minute write quota;
+    # error_rate makes a random share of writes fail the same way.
+
+    def __init__(self, latency=0.0, fail_next=0, error_rate=0.0, jitter=0.2, col_count=26):
+        self.latency = latency
+        self.col_count = col_count
+        self.fail_next = fail_next
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.rows = []
+        self.write_calls = 0
+        self._lock = threading.Lock()
+
+    def _write(self, rows):
+        _sleep(self.latency, self.jitter)
+        with self._lock:
+            self.write_calls += 1
+            if self.fail_next > 0 or random.random() < self.error_rate:
+                self.fail_next = max(0, self.fail_next - 1)
+                raise FakeAPIError(429, "Quota exceeded for quota metric 'Write requests'")
+            self.rows.extend([list(row) for row in rows])
+            start = len(self.rows) - len(rows) + 1
+        # Same shape as the Sheets API reply gspread returns
+        return {"updates": {"updatedRange": f"Sheet1!A{start}:A{start + max(len(rows), 1) - 1}", "updatedRows": len(rows)}}
+
+    def append_row(self, row, **kwargs):
+        return self._write([row])
+
+    def append_rows(self, rows, **kwargs):
+        return self._write(rows)
+
+    def get_all_values(self):
+        _sleep(self.latency, self.jitter)
+        with self._lock:
+            return [list(row) for row in self.rows]
+
+    def add_cols(self, cols):
+        self.col_count += cols
+
+    def batch_update(self, data, **kwargs):
+        # Bounded "AC5:AI5" or "AC2:AC40" ranges, as the rescore job writes
+        self._write([])
+        with self._lock:
+            for update in data:
+                start, end = update["range"].split(":")
+                first_row = int(re.sub(r"\D", "", start))
+                first_col = _column_index(re.sub(r"\d", "", start))
+                for row, values in enumerate(update["values"], start=first_row):
+                    while len(self.rows) < row:
+                        self.rows.append([])
+                    cells = self.rows[row - 1]
+                    for offset, value in enumerate(values):
+                        while len(cells) <= first_col + offset:
+                            cells.append("")
+                        cells[first_col + offset] = value
+
+    def row_values(self, row):
+        _sleep(self.latency, self.jitter)
+        with self._lock:
+            return [str(v) for v in self.rows[row - 1]] if row <= len(self.rows) else []
+
+    def delete_rows(self, start_index, end_index=None):
+        self._write([])
+        with self._lock:
+            del self.rows[start_index - 1:end_index or start_index]
+
+    def batch_get(self, ranges, **kwargs):
+        # "A2:C" (open-ended), "A2:C10" or single-cell "AC5" ranges
+        _sleep(self.latency, self.jitter)
+        results = []
+        with self._lock:
+            for a1 in ranges:
+                start, end = a1.split(":") if ":" in a1 else (a1, a1)
+                first_row = int(re.sub(r"\D", "", start))
+                last_row = int(re.sub(r"\D", "", end) or len(self.rows))
+                first_col, last_col = _column_index(re.sub(r"\d", "", start)), _column_index(re.sub(r"\d", "", end))
+                values = [row[first_col:last_col + 1] for row in self.rows[first_row - 1:last_row]]
+                while values and not any(values[-1]):
+                    values.pop()
+                results.append([[str(v) for v in cells] for cells in values])
+        return results
+
+
+class FakeUsage:
+    def __init__(self, prompt_tokens, response_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = response_tokens
+        self.total_token_count = prompt_tokens + response_tokens
+
+
+class FakeResponse:
+    def __init__(self, text, prompt):
+        self.text = text
+        self.usage_metadata = FakeUsage(len(prompt) // 4, len(text) // 4)
+
+
+class FakeTokenCount:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+
+class FakeModel:
+    # Stands in for genai.GenerativeModel. Returns response_text (or
+    # json_text when JSON output is requested) after a simulated delay;
+    # error_rate of calls raise a 429 or 500 instead. A call can pass
+    # response=(text, json_text) to be answered with those instead.
+
+    def __init__(self, response_text="", json_text=None, latency=0.0, error_rate=0.0, jitter=0.2,
+                 model_name="models/fake-gemini", stream_chunk_size=200):
+        self.response_text = response_text
+        self.json_text = json_text
+        self.latency = latency
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.model_name = model_name
+        self.stream_chunk_size = stream_chunk_size
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _text_for(self, generation_config, response=None):
+        text, json_text = response or (self.response_text, self.json_text)
+        if generation_config and json_text is not None:
+            return json_text
+        return text
+
+    def generate_content(self, prompt, stream=False, generation_config=None, response=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if random.random() < self.error_rate:
+            _sleep(self.latency / 4, self.jitter)
+            raise FakeAPIError(random.choice((429, 500)), "Simulated Gemini failure")
+
+        text = self._text_for(generation_config, response)
+        if not stream:
+            _sleep(self.latency, self.jitter)
+            return FakeResponse(text, prompt)
+
+        def chunks():
+            size = self.stream_chunk_size
+            pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+            for piece in pieces:
+                _sleep(self.latency / len(pieces), self.jitter)
+                yield FakeResponse(piece, prompt)
+        return chunks()
+
+    def count_tokens(self, contents):
+        return FakeTokenCount(len(str(contents)) // 4)
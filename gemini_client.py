@@ -0,0 +1,234 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# ----------------------------
+# Resilient Gemini Client
+# ----------------------------
+# Wraps a GenerativeModel (or a fakes.FakeModel) with the safety net the
+# bare client lacks:
+# - every call has an overall deadline, and each attempt is told how much
+#   of it is left
+# - quota errors, 5xx and timeouts are retried with jittered exponential
+#   backoff, never past the deadline
+# - a circuit breaker stops hammering a model that keeps failing and
+#   routes to the fallback model while it cools down
+# - optionally, when the main model hasn't answered after fallback_after
+#   seconds, the fallback model is asked too and the first answer wins
+# - optionally, a hedged duplicate request goes out once a call has taken
+#   longer than the recent p95
+# - a before_attempt hook passed to generate_content runs ahead of every
+#   request that goes out, retries, fallbacks and hedges included, so a
+#   caller's rate limiter sees all of them
+# Replies say which model answered and how many retries it took.
+
+DEADLINE = 180
+MAX_ATTEMPTS = 4
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 20.0
+FAILURE_THRESHOLD = 5
+COOLDOWN = 60
+HEDGE_MIN_SAMPLES = 20
+MAX_PARALLEL_CALLS = 16
+
+# Request timeout, quota, and transient server errors
+RETRYABLE_CODES = (408, 429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def is_retryable(error):
+    if isinstance(error, TimeoutError):
+        return True
+    try:
+        return int(getattr(error, "code", None)) in RETRYABLE_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+def short_name(model_name):
+    return (model_name or "").split("/")[-1]
+
+
+def call_meta(reply):
+    # Sheet row columns for the call that produced reply
+    info = getattr(reply, "call_info", None) or {}
+    return {"Model": info.get("model", ""), "Retries": info.get("retries", 0)}
+
+
+def answered_by(meta, model_name):
+    # Whether the call behind call_meta() output was answered by model_name
+    # (and not its fallback); calls without call info count as answered
+    return not meta.get("Model") or meta["Model"] == short_name(model_name)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # Let one trial call through, and hold the rest for another cooldown
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class Reply:
+    # A model response plus call_info; everything else is the response's
+    def __init__(self, response, model_name, retries, hedged=False):
+        self.response = response
+        self.call_info = {"model": short_name(model_name), "retries": retries, "hedged": hedged}
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+    def __iter__(self):
+        return iter(self.response)
+
+
+class ResilientModel:
+    def __init__(self, model, fallback=None, deadline=DEADLINE, max_attempts=MAX_ATTEMPTS, fallback_after=None,
+                 hedge=False, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN, sleep=time.sleep):
+        self.model = model
+        self.model_name = model.model_name
+        self.fallback = fallback
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.fallback_after = fallback_after
+        self.hedge = hedge
+        self.sleep = sleep
+        self.breakers = {m.model_name: CircuitBreaker(failure_threshold, cooldown) for m in (model, fallback) if m}
+        self._latencies = deque(maxlen=200)
+        self._executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_CALLS, thread_name_prefix="gemini")
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def shutdown(self):
+        # Stops the call threads once running calls finish; the app's model
+        # lives as long as the process, but benchmarks and tests build their own
+        self._executor.shutdown(wait=True)
+
+    def p95(self):
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _pick(self):
+        if self.breakers[self.model_name].allow():
+            return self.model
+        if self.fallback and self.breakers[self.fallback.model_name].allow():
+            return self.fallback
+        raise CircuitOpenError(f"{short_name(self.model_name)} is failing repeatedly; pausing calls for {COOLDOWN}s")
+
+    def _call(self, model, prompt, timeout, kwargs, before_attempt=None):
+        if before_attempt:
+            before_attempt()
+        kwargs = dict(kwargs)
+        kwargs.setdefault("request_options", {"timeout": timeout})
+        started = time.monotonic()
+        try:
+            response = model.generate_content(prompt, **kwargs)
+        except Exception as e:
+            if is_retryable(e):
+                self.breakers[model.model_name].failure()
+            raise
+        self.breakers[model.model_name].success()
+        if model is self.model and not kwargs.get("stream"):
+            self._latencies.append(time.monotonic() - started)
+        return response
+
+    def _launches(self, model):
+        # (delay, model) for the main request and any backups
+        launches = [(0.0, model)]
+        if self.fallback and model is self.model and self.fallback_after:
+            launches.append((self.fallback_after, self.fallback))
+        p95 = self.p95() if self.hedge else None
+        if p95 is not None:
+            launches.append((p95, model))
+        return sorted(launches, key=lambda launch: launch[0])
+
+    def _attempt(self, model, prompt, remaining, kwargs, before_attempt=None):
+        started = time.monotonic()
+        launches = self._launches(model)
+        pending = {}
+        launched = 0
+        error = None
+        while True:
+            elapsed = time.monotonic() - started
+            if elapsed >= remaining:
+                # Abandoned requests finish (and are billed) in the background
+                self.breakers[model.model_name].failure()
+                raise TimeoutError(f"No reply from {short_name(model.model_name)} within {remaining:.1f}s")
+            while launches and launches[0][0] <= elapsed:
+                _, target = launches.pop(0)
+                if target is not model and not self.breakers[target.model_name].allow():
+                    continue
+                pending[self._executor.submit(
+                    self._call, target, prompt, remaining - elapsed, kwargs, before_attempt)] = target
+                launched += 1
+            if error and not pending:
+                raise error
+            wait_for = remaining - elapsed
+            if launches:
+                wait_for = min(wait_for, launches[0][0] - elapsed)
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                target = pending.pop(future)
+                if future.exception() is None:
+                    return future.result(), target, launched > 1
+                error = future.exception()
+
+    def generate_content(self, prompt, stream=False, before_attempt=None, **kwargs):
+        deadline = time.monotonic() + self.deadline
+        retries = 0
+        while True:
+            model = self._pick()
+            remaining = deadline - time.monotonic()
+            try:
+                if stream:
+                    # Streams are retried only until they start; no hedging
+                    response = self._call(model, prompt, remaining, {**kwargs, "stream": True}, before_attempt)
+                    used, hedged = model, False
+                else:
+                    response, used, hedged = self._attempt(model, prompt, remaining, kwargs, before_attempt)
+            except Exception as e:
+                if not is_retryable(e) or retries + 1 >= self.max_attempts:
+                    raise
+                delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** retries))
+                if time.monotonic() + delay >= deadline:
+                    raise
+                retries += 1
+                self.sleep(delay)
+                continue
+            return Reply(response, used.model_name, retries, hedged)
@@ -0,0 +1,159 @@
+import time
+from datetime import datetime, timezone, timedelta
+
+import analysis
+import analysis_cache
+import archive
+import chunking
+import consensus
+import gemini_client
+import metrics
+import preprocess
+import services
+import similarity
+
+# ----------------------------
+# Interview Analysis Job
+# ----------------------------
+# Everything the Analyze button does, from cache lookup to the queued sheet
+# row, run as a background job (see jobs.py) so a rerun of the page can't
+# lose it. Progress and streamed text are published on the job for the page
+# to poll; the return value is what the page shows as the last analysis.
+
+
+def render_progress(parser):
+    parts = [f"{'✅' if q in parser.answers else '⏳'} {q}" for q in ("Q1", "Q2", "Q3")]
+    for key in analysis.RUBRIC_KEYS:
+        score = parser.scores.get(key)
+        parts.append(f"**{key}:** {score}/5" if score else f"⏳ {key}")
+    return " · ".join(parts)
+
+
+def run(job, model, interviewer, candidate_name, transcript, structured=True, stream=False, force=False, setup_seconds=0.0,
+        preprocessing=preprocess.DEFAULT_MODE, consensus_mode=False, env=None):
+    # env provides the getters used below, like services does; the pipeline
+    # benchmark passes one backed by fakes
+    env = env or services
+    trace = metrics.Trace("interview", env.MODEL_NAME, setup_seconds)
+    notes = []
+
+    # Gemini sees the cleaned-up transcript; the sheet keeps the original
+    with trace.stage("preprocess"):
+        prompt_transcript, cleanup = preprocess.preprocess(transcript, preprocessing, interviewer)
+    trace.extra["preprocessing"] = preprocessing
+    trace.extra["tokens_saved"] = cleanup["tokens_saved"]
+    if cleanup["tokens_saved"] > 0:
+        notes.append(f"✂️ Transcript cleanup ({preprocessing}) saved ~{cleanup['tokens_saved']:,} of {cleanup['tokens_before']:,} tokens.")
+
+    cache = env.get_analysis_cache()
+    version = analysis.prompt_version(structured) + ("/consensus" if consensus_mode else "")
+    cache_key = analysis_cache.cache_key(prompt_transcript, candidate_name, env.MODEL_NAME, version)
+    with trace.stage("cache_lookup"):
+        cached = None if force else cache.get(cache_key)
+    trace.extra["cache_hit"] = bool(cached)
+
+    if cached:
+        response = cached["response"]
+        result = analysis.AnalysisResult.from_dict(cached["parsed"])
+    else:
+        job.update(progress="Preparing transcript...")
+        with trace.stage("prompt"):
+            prompt, prompt_info = chunking.prepare_prompt(model, candidate_name, prompt_transcript, before_call=job.check, structured=structured)
+        trace.extra["prompt_mode"] = prompt_info["mode"]
+        if prompt_info["mode"] == "chunked":
+            notes.append(f"📚 Long transcript (~{prompt_info['tokens']:,} tokens): analyzed in {prompt_info['chunks']} parts and scored over the combined notes.")
+        job.check()
+        job.update(progress="Analyzing transcript...")
+
+        if consensus_mode:
+            job.update(progress=f"Scoring with {len(consensus.CONFIGS)} models in parallel...")
+            with trace.stage("model"):
+                result, replies, stats, errors = consensus.score(env.get_model, prompt, structured, before_call=job.check)
+            trace.capture_many(replies)
+            trace.model_name = env.MODEL_NAME
+            trace.extra["consensus_runs"] = len(replies)
+            response = replies[0].text
+            notes.append(f"🗳️ Median scores from {result.meta['Consensus']} (mean variance {result.meta['Score Variance']}).")
+            for key, category in stats.items():
+                if category["flagged"]:
+                    runs = ", ".join(str(score) for score in category["scores"])
+                    notes.append(f"⚖️ Runs disagree on {key}: {runs} (variance {category['variance']}).")
+            notes.extend(f"⚠️ Consensus run failed: {error}" for error in errors)
+        elif structured:
+            with trace.stage("model"):
+                reply = model.generate_content(prompt, generation_config=analysis.JSON_GENERATION_CONFIG)
+                response = reply.text
+            trace.capture(reply)
+            with trace.stage("parse"):
+                result = analysis.parse_response(response, structured=True)
+            result.meta.update(gemini_client.call_meta(reply))
+            if result.source != "json":
+                notes.append("⚠️ Gemini didn't return valid JSON; scores were read from the text instead.")
+        elif stream:
+            parser = analysis.IncrementalParser()
+            model_start = time.perf_counter()
+            call = {}
+            for chunk in analysis.stream_response(model, prompt, trace, meta=call):
+                job.check()
+                if "first_token" not in trace.stages:
+                    trace.add("first_token", time.perf_counter() - model_start)
+                with trace.stage("parse"):
+                    parser.feed(chunk)
+                job.update(progress=render_progress(parser), partial=parser.text)
+            trace.add("model", time.perf_counter() - model_start - trace.stages.get("parse", 0.0))
+            with trace.stage("parse"):
+                result = parser.finish()
+            result.meta.update(call)
+            response = parser.text
+        else:
+            with trace.stage("model"):
+                reply = model.generate_content(prompt)
+                response = reply.text
+            trace.capture(reply)
+            with trace.stage("parse"):
+                result = analysis.parse_response(response)
+            result.meta.update(gemini_client.call_meta(reply))
+
+        # A fallback model's answer isn't cached under the main model's key
+        if consensus_mode or gemini_client.answered_by(result.meta, env.MODEL_NAME):
+            with trace.stage("cache_store"):
+                cache.put(cache_key, response, result.to_dict())
+
+    result.meta["Preprocessing"] = preprocessing
+    result.meta["Analysis Key"] = analysis.analysis_key(candidate_name, interviewer, transcript)
+
+    # Last chance to stop before anything is written to the sheet
+    job.check()
+    with trace.stage("row"):
+        timestamp = datetime.now(timezone(timedelta(hours=8))).strftime("%Y-%m-%d %H:%M:%S")
+        row = result.to_row(timestamp, interviewer, candidate_name, transcript)
+        # The live sheet gets references to the archived text (or, with
+        # offloading off, long transcripts spill over onto the overflow sheet)
+        sheet_row, archive_rows, overflow_rows = archive.for_sheet(row)
+
+    with trace.stage("sheet_enqueue"):
+        write_id = env.get_sheet_writer().enqueue(sheet_row)
+        if archive_rows:
+            env.get_text_archive().add_rows(archive_rows)
+            env.get_text_archive_writer().enqueue_many(archive_rows)
+        if overflow_rows:
+            env.get_overflow_writer().enqueue_many(overflow_rows)
+    with trace.stage("store"):
+        env.get_analysis_store().add(row, transcript)
+    # The row is saved by now; a failed embedding mustn't fail the job
+    try:
+        with trace.stage("embed"):
+            env.get_similarity_index().add(similarity.record_from_row(row))
+    except Exception as e:
+        notes.append(f"⚠️ Couldn't add this analysis to the similar-candidates index: {e}")
+    env.get_metrics_store().record(trace)
+
+    if overflow_rows:
+        notes.append(f"📎 Transcript is longer than a Google Sheets cell; the full text is saved in {len(overflow_rows)} parts on the '{analysis.OVERFLOW_SHEET_NAME}' sheet.")
+    return {
+        "candidate_name": candidate_name,
+        "markdown": result.to_markdown(),
+        "from_cache": bool(cached),
+        "write_id": write_id,
+        "notes": notes,
+    }
@@ -0,0 +1,141 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+# ----------------------------
+# Background Jobs
+# ----------------------------
+# Streamlit throws away whatever the script thread was doing when the user
+# clicks something, so long work (the Gemini call and the sheet write) runs
+# on a process-wide pool instead. Pages keep only the job ID in
+# session_state and poll it. Jobs can't be interrupted mid-call, so
+# cancellation and timeouts are checked between steps via job.check().
+# The timeout counts from when a worker picks the job up, so time spent
+# waiting for a free slot doesn't eat into it.
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed out"
+FINISHED = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+# Finished jobs are forgotten after this many seconds
+KEEP_FINISHED = 3600
+
+
+class JobStopped(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, timeout):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.progress = ""
+        self.partial = ""  # text streamed so far, for live display
+        self.result = None
+        self.error = ""
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.timeout = timeout
+        self.deadline = None  # set by start()
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    def start(self):
+        self.status = RUNNING
+        self.started = time.time()
+        self.deadline = self.started + self.timeout
+
+    @property
+    def expired(self):
+        return self.deadline is not None and time.time() > self.deadline
+
+    def check(self):
+        # Called by the job between steps; raises to stop it
+        if self._cancel.is_set():
+            raise JobStopped(CANCELLED)
+        if self.expired:
+            raise JobStopped(TIMED_OUT)
+
+    def update(self, progress=None, partial=None):
+        if progress is not None:
+            self.progress = progress
+        if partial is not None:
+            self.partial = partial
+
+    def _finish(self, status, result=None, error=""):
+        if self.done:
+            return  # already reported as cancelled or timed out
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+
+
+class JobRunner:
+    def __init__(self, max_workers=None, timeout=None):
+        self.max_workers = max_workers or config.MAX_CONCURRENT_JOBS
+        self.timeout = timeout or config.JOB_TIMEOUT
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, timeout=None, **kwargs):
+        # fn is called as fn(job, *args, **kwargs) and its return value
+        # becomes job.result
+        job = Job(timeout or self.timeout)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            job.check()
+            job.start()
+            result = fn(job, *args, **kwargs)
+        except JobStopped as e:
+            job._finish(str(e), error=f"Analysis {e}.")
+        except Exception as e:
+            job._finish(FAILED, error=str(e))
+        else:
+            job._finish(DONE, result)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job and not job.done and job.expired:
+            # Report the timeout now; the worker stops at its next check()
+            job._cancel.set()
+            job._finish(TIMED_OUT, error="Analysis timed out.")
+        return job
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job._cancel.set()
+        if job._future.cancel():
+            job._finish(CANCELLED, error="Analysis cancelled.")
+        return True
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def _prune(self):
+        cutoff = time.time() - KEEP_FINISHED
+        for job_id in [i for i, job in self._jobs.items() if job.done and job.finished < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,236 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+
+import config
+
+# ----------------------------
+# Analyze Pipeline Metrics
+# ----------------------------
+# Each analysis carries a Trace that times its stages (setup, prompt, the
+# Gemini call, parsing, sheet enqueue...) and picks up Gemini's usage
+# metadata. Finished traces are logged as one JSON line and kept in a local
+# SQLite file so slow calls and token/cost trends can be queried over days.
+
+logger = logging.getLogger("lokafy.metrics")
+
+# USD per million tokens (input, output), for rough cost trends only
+PRICES = {
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+# Same clock as the timestamps written to the sheet
+LOCAL_TZ = timezone(timedelta(hours=8))
+
+
+def _model_key(model_name):
+    return (model_name or "").split("/")[-1]
+
+
+class Trace:
+    def __init__(self, kind, model_name="", setup_seconds=0.0):
+        # setup_seconds: time spent before the trace began (app startup),
+        # counted as the "setup" stage and in the total
+        self.kind = kind
+        self.model_name = model_name
+        self.started = time.time()
+        self._clock = time.perf_counter() - setup_seconds
+        self.stages = {"setup": setup_seconds} if setup_seconds else {}
+        self.usage = {}
+        self.finish_reason = ""
+        self.extra = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def capture(self, response):
+        # Works for whole responses and stream chunks; usage arrives with the last chunk
+        call = getattr(response, "call_info", None)
+        if call:
+            # The resilient client may have answered from the fallback model
+            self.model_name = call["model"]
+            self.extra["retries"] = call["retries"]
+            self.extra["hedged"] = call["hedged"]
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and getattr(usage, "total_token_count", 0):
+            self.usage = {
+                "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+                "response_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+                "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+            }
+        candidates = getattr(response, "candidates", None)
+        if candidates:
+            reason = getattr(candidates[0], "finish_reason", None)
+            if reason:
+                self.finish_reason = getattr(reason, "name", str(reason))
+
+    def capture_many(self, responses):
+        # Several independent calls (e.g. consensus runs): usage is summed
+        totals = {}
+        for response in responses:
+            self.usage = {}
+            self.capture(response)
+            for name, count in self.usage.items():
+                totals[name] = totals.get(name, 0) + count
+        self.usage = totals
+
+    def cost(self):
+        input_price, output_price = PRICES.get(_model_key(self.model_name), (0.0, 0.0))
+        return (
+            self.usage.get("prompt_tokens", 0) * input_price
+            + self.usage.get("response_tokens", 0) * output_price
+        ) / 1_000_000
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "model": self.model_name,
+            "started": self.started,
+            # Wall clock: stages overlap (first_token is part of model)
+            "total_ms": (time.perf_counter() - self._clock) * 1000,
+            "stages_ms": {name: seconds * 1000 for name, seconds in self.stages.items()},
+            "finish_reason": self.finish_reason,
+            "cost_usd": self.cost(),
+            **self.usage,
+            **self.extra,
+        }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))]
+
+
+class MetricsStore:
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or config.data_path("metrics.sqlite"), check_same_thread=False)
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS traces (
+                ts REAL NOT NULL,
+                day TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                model TEXT,
+                finish_reason TEXT,
+                prompt_tokens INTEGER,
+                response_tokens INTEGER,
+                cached_tokens INTEGER,
+                cost_usd REAL,
+                total_ms REAL,
+                stages TEXT,
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS traces_day ON traces (day);
+            CREATE TABLE IF NOT EXISTS flushes (
+                ts REAL NOT NULL,
+                day TEXT NOT NULL,
+                worksheet TEXT,
+                rows INTEGER,
+                ms REAL,
+                ok INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS flushes_day ON flushes (day);"""
+        )
+
+    @staticmethod
+    def _day(ts):
+        return datetime.fromtimestamp(ts, LOCAL_TZ).strftime("%Y-%m-%d")
+
+    def record(self, trace):
+        data = trace.to_dict()
+        logger.info(json.dumps(data))
+        known = {"kind", "model", "started", "total_ms", "stages_ms", "finish_reason", "cost_usd",
+                 "prompt_tokens", "response_tokens", "cached_tokens"}
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO traces VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    trace.started,
+                    self._day(trace.started),
+                    trace.kind,
+                    trace.model_name,
+                    trace.finish_reason,
+                    data.get("prompt_tokens", 0),
+                    data.get("response_tokens", 0),
+                    data.get("cached_tokens", 0),
+                    data["cost_usd"],
+                    data["total_ms"],
+                    json.dumps(data["stages_ms"]),
+                    json.dumps({k: v for k, v in data.items() if k not in known}),
+                )
+            )
+            self._conn.commit()
+
+    def record_flush(self, worksheet, rows, seconds, ok):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO flushes VALUES (?, ?, ?, ?, ?, ?)",
+                (now, self._day(now), worksheet, rows, seconds * 1000, int(ok))
+            )
+            self._conn.commit()
+
+    def _since(self, days):
+        return self._day(time.time() - days * 86400)
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, args)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def recent(self, limit=50):
+        return self._query(
+            "SELECT datetime(ts, 'unixepoch', '+8 hours') AS time, kind, model, finish_reason, prompt_tokens, "
+            "response_tokens, cached_tokens, ROUND(cost_usd, 4) AS cost_usd, ROUND(total_ms) AS total_ms, stages "
+            "FROM traces ORDER BY ts DESC LIMIT ?",
+            (limit,)
+        )
+
+    def slow_calls(self, threshold_ms, days=7, limit=50):
+        return self._query(
+            "SELECT datetime(ts, 'unixepoch', '+8 hours') AS time, kind, model, ROUND(total_ms) AS total_ms, stages, extra "
+            "FROM traces WHERE day >= ? AND total_ms >= ? ORDER BY total_ms DESC LIMIT ?",
+            (self._since(days), threshold_ms, limit)
+        )
+
+    def daily(self, days=30):
+        return self._query(
+            "SELECT day, COUNT(*) AS analyses, SUM(prompt_tokens) AS prompt_tokens, "
+            "SUM(response_tokens) AS response_tokens, ROUND(SUM(cost_usd), 4) AS cost_usd, "
+            "ROUND(AVG(total_ms)) AS avg_ms, ROUND(MAX(total_ms)) AS max_ms "
+            "FROM traces WHERE day >= ? GROUP BY day ORDER BY day",
+            (self._since(days),)
+        )
+
+    def stage_percentiles(self, days=7):
+        samples = {}
+        for row in self._query("SELECT stages FROM traces WHERE day >= ?", (self._since(days),)):
+            for name, ms in json.loads(row["stages"]).items():
+                samples.setdefault(name, []).append(ms)
+        return [
+            {"stage": name, "n": len(values), "p50_ms": round(percentile(values, 50), 1), "p95_ms": round(percentile(values, 95), 1)}
+            for name, values in sorted(samples.items())
+        ]
+
+    def flushes(self, days=7, limit=50):
+        return self._query(
+            "SELECT datetime(ts, 'unixepoch', '+8 hours') AS time, worksheet, rows, ROUND(ms) AS ms, ok "
+            "FROM flushes WHERE day >= ? ORDER BY ts DESC LIMIT ?",
+            (self._since(days), limit)
+        )
@@ -0,0 +1,94 @@
+import streamlit as st
+import time
+
+import batch
+import preprocess
+import services
+import similarity
+
+# ----------------------------
+# API Keys and setup
+# ----------------------------
+model, _ = services.get_services()
+
+# ----------------------------
+# Helper Functions
+# ----------------------------
+def save_item(item):
+    # Runs in the batch worker as each item finishes, so rows are queued
+    # even if the page is rerun or left before the batch is done. The
+    # archived text is queued right behind the row that points at it.
+    services.get_sheet_writer().enqueue(item["sheet_row"])
+    if item["archive_rows"]:
+        services.get_text_archive().add_rows(item["archive_rows"])
+        services.get_text_archive_writer().enqueue_many(item["archive_rows"])
+    if item["overflow_rows"]:
+        services.get_overflow_writer().enqueue_many(item["overflow_rows"])
+    services.get_analysis_store().add(item["row"], item["transcript"])
+    try:
+        services.get_similarity_index().add(similarity.record_from_row(item["row"]))
+    except Exception as e:
+        item["error"] = f"Not added to the similar-candidates index: {e}"
+
+# ----------------------------
+# App UI
+# ----------------------------
+st.title("📦 Batch Interview Analysis")
+
+st.caption("Upload transcripts (.txt/.md/.vtt/.srt or a .zip) plus a CSV with file, interviewer and candidate columns, or point at a folder on the server.")
+batch_files = st.file_uploader("Transcripts and names CSV", accept_multiple_files=True, type=["txt", "md", "vtt", "srt", "zip", "csv"])
+batch_folder = st.text_input("…or a server folder path", key="batch_folder")
+bcol1, bcol2 = st.columns(2)
+with bcol1:
+    batch_workers = st.number_input("Parallel calls", min_value=1, max_value=8, value=batch.MAX_WORKERS)
+with bcol2:
+    batch_rpm = st.number_input("Max requests per minute", min_value=1, max_value=60, value=batch.REQUESTS_PER_MINUTE)
+structured_mode = st.toggle("🧩 Structured scores (JSON)", value=True)
+preprocessing = st.selectbox("✂️ Transcript cleanup", preprocess.MODES, index=preprocess.MODES.index(preprocess.DEFAULT_MODE), key="batch_preprocessing")
+batch_clicked = st.button("🚀 Run batch")
+
+if batch_clicked:
+    if batch_files:
+        transcripts, names_csv = batch.read_uploads(batch_files)
+    elif batch_folder:
+        transcripts, names_csv = batch.read_folder(batch_folder)
+    else:
+        transcripts, names_csv = {}, None
+
+    if not transcripts:
+        st.warning("No transcripts found.")
+    elif not names_csv:
+        st.warning("Please include a CSV of interviewer and candidate names.")
+    else:
+        items = batch.build_items(transcripts, batch.parse_names_csv(names_csv))
+        futures = batch.run_batch(
+            model,
+            services.MODEL_NAME,
+            items,
+            max_workers=int(batch_workers),
+            per_minute=int(batch_rpm),
+            cache=services.get_analysis_cache(),
+            structured=structured_mode,
+            metrics_store=services.get_metrics_store(),
+            preprocessing=preprocessing,
+            on_row=save_item
+        )
+
+        status_table = st.empty()
+        while True:
+            status_table.dataframe(
+                [{"File": i["file"], "Lokafyer": i["candidate_name"], "Status": i["status"], "Tokens saved": i["tokens_saved"], "Error": i["error"]} for i in items],
+                use_container_width=True
+            )
+            if all(f.done() for f in futures):
+                break
+            time.sleep(0.5)
+
+        for f in futures:
+            if f.exception():
+                st.error(f"Batch item failed: {f.exception()}")
+
+        queued = sum(1 for f in futures if not f.exception() and f.result()["row"])
+        if queued:
+            st.success(f"🕒 Queued {queued} of {len(items)} analyses for Google Sheets.")
+
@@ -0,0 +1,64 @@
+import time
+
+import streamlit as st
+
+import analytics
+import services
+
+# ----------------------------
+# Helper Functions
+# ----------------------------
+def download(label, frame, file_name):
+    st.download_button(f"⬇️ {label} (CSV)", analytics.to_csv(frame), file_name=file_name, mime="text/csv")
+
+# ----------------------------
+# App UI
+# ----------------------------
+st.title("📊 Scores Dashboard")
+
+reader = services.get_sheet_reader()
+if st.button("🔄 Reload everything from Google Sheets"):
+    reader.sync(full=True)
+
+load_start = time.perf_counter()
+df = analytics.to_frame(reader.read())
+load_ms = (time.perf_counter() - load_start) * 1000
+st.caption(
+    f"{len(df):,} interviews · loaded in {load_ms:.0f} ms · "
+    f"last sync fetched {reader.last_fetch['rows']} new rows in {reader.last_fetch['seconds'] * 1000:.0f} ms"
+)
+
+if df.empty:
+    st.info("No scored interviews yet.")
+    st.stop()
+
+mcol1, mcol2, mcol3 = st.columns(3)
+mcol1.metric("Interviews", f"{len(df):,}")
+mcol2.metric("Average total", f"{df['total_score'].mean():.1f}/30")
+mcol3.metric("Lokafyers", f"{df['candidate'].nunique():,}")
+
+st.subheader("Scores by category")
+categories = analytics.category_distribution(df)
+st.bar_chart(categories.set_index("category")["mean"], horizontal=True)
+st.dataframe(categories, use_container_width=True, hide_index=True)
+download("Category distribution", categories, "category_distribution.csv")
+
+st.subheader("Trends")
+drift = analytics.drift(df).set_index("period")
+st.line_chart(drift[analytics.CATEGORIES])
+st.caption("Spread between interviewers' average totals per month; a widening spread means raters are drifting apart.")
+st.line_chart(drift["rater_spread"])
+download("Monthly trends", drift.reset_index(), "score_trends.csv")
+
+st.subheader("By interviewer")
+interviewers = analytics.interviewer_distribution(df)
+st.dataframe(interviewers, use_container_width=True, hide_index=True)
+download("Interviewer distribution", interviewers, "interviewer_distribution.csv")
+
+st.subheader("⚖️ Interviewer calibration")
+min_interviews = st.number_input("Only interviewers with at least this many interviews", min_value=1, value=analytics.MIN_INTERVIEWS)
+calibration = analytics.calibration(df, min_interviews=int(min_interviews))
+st.caption("Average z-score of each interviewer's rubric scores against the whole team: below zero is harsher, above zero more generous.")
+st.dataframe(calibration, use_container_width=True, hide_index=True)
+download("Calibration report", calibration, "interviewer_calibration.csv")
+download("Bias-adjusted totals", analytics.normalized_scores(df), "adjusted_totals.csv")
@@ -0,0 +1,105 @@
+import streamlit as st
+
+import archive
+import config
+import jobs
+import services
+
+# ----------------------------
+# Helper Functions
+# ----------------------------
+def start_rotation(days):
+    # Moving thousands of rows takes a while; allow an hour
+    st.session_state.rotation_job = services.get_job_runner().submit(
+        archive.rotate,
+        services.get_sheet(),
+        services.get_worksheet,
+        services.get_sheet_reader(),
+        days,
+        timeout=3600,
+        # The writer waits while rows are deleted; its row numbers are
+        # stale afterwards
+        on_moved=lambda count: services.get_sheet_writer().reset_index(),
+        hold=services.get_sheet_writer().paused
+    ).id
+
+@st.fragment(run_every=1)
+def show_rotation_progress(job_id):
+    job = services.get_job_runner().get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    st.info(f"⏳ {job.progress or 'Waiting for a free slot...'}")
+
+def show_rotation_result(job):
+    if job is None:
+        st.warning("The archive job was lost (the server restarted). Please start it again.")
+    elif job.status == jobs.DONE:
+        months = ", ".join(job.result["months"]) or "nothing to move"
+        st.success(f"✅ Moved {job.result['moved']:,} rows ({months}).")
+        if job.result.get("changed"):
+            st.info(f"{job.result['changed']:,} rows were re-submitted while moving and stay on the live sheet.")
+    else:
+        st.warning(f"⚠️ {job.error}")
+
+# ----------------------------
+# Admin gate
+# ----------------------------
+# app.py only lists this page for admins; check again in case the URL is
+# opened directly.
+if not services.is_admin():
+    st.error("This page is only available to admins.")
+    st.stop()
+
+store = services.get_metrics_store()
+
+# ----------------------------
+# App UI
+# ----------------------------
+st.title("📈 Diagnostics")
+
+days = st.slider("Look back (days)", min_value=1, max_value=90, value=7)
+
+st.subheader("⏱️ Stage latency")
+st.dataframe(store.stage_percentiles(days), use_container_width=True, hide_index=True)
+
+st.subheader("📅 Daily usage")
+daily = store.daily(days)
+if daily:
+    st.dataframe(daily, use_container_width=True, hide_index=True)
+    st.line_chart(
+        {
+            "prompt tokens": [row["prompt_tokens"] or 0 for row in daily],
+            "response tokens": [row["response_tokens"] or 0 for row in daily],
+        }
+    )
+    st.line_chart({"cost (USD)": [row["cost_usd"] or 0 for row in daily]})
+else:
+    st.caption("No analyses recorded yet.")
+
+st.subheader("🐢 Slow calls")
+threshold = st.number_input("Slower than (ms)", min_value=0, value=30000, step=1000)
+st.dataframe(store.slow_calls(threshold, days), use_container_width=True, hide_index=True)
+
+st.subheader("🕑 Recent analyses")
+st.dataframe(store.recent(), use_container_width=True, hide_index=True)
+
+st.subheader("📝 Sheet flushes")
+st.dataframe(store.flushes(days), use_container_width=True, hide_index=True)
+
+st.subheader("🚀 Startup")
+timings = services.startup_report()
+st.json(timings)
+
+st.subheader("🗄️ Sheet archive")
+st.caption(f"{services.get_text_archive().count():,} analyses have their text stored on the '{archive.TEXT_ARCHIVE_SHEET_NAME}' sheet"
+           + ("." if config.OFFLOAD_TEXT else "; offloading is off for new rows."))
+rotation = services.get_job_runner().get(st.session_state.get("rotation_job"))
+running = rotation is not None and not rotation.done
+archive_days = st.number_input("Move rows older than (days) to the month archive sheets", min_value=1, value=config.ARCHIVE_AFTER_DAYS)
+if st.button("Archive old rows", disabled=running):
+    start_rotation(archive_days)
+    running = True
+if running:
+    show_rotation_progress(st.session_state.rotation_job)
+elif "rotation_job" in st.session_state:
+    show_rotation_result(rotation)
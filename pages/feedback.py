@@ -0,0 +1,3 @@
+import call_review
+
+call_review.render("🎤 Lokafy Feedback Call Analysis", "Feedback Calls", key="feedback")
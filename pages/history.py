@@ -0,0 +1,98 @@
+import streamlit as st
+
+import analysis
+import analysis_store
+import archive
+import services
+import similarity
+
+# ----------------------------
+# Helper Functions
+# ----------------------------
+def import_from_sheet():
+    # One read of each worksheet (month archives included); rows already in
+    # the store are skipped. Returns (added, skipped for missing text).
+    sheet_values = services.read_all_values()
+    overflow_values = services.get_worksheet(analysis.OVERFLOW_SHEET_NAME, services.OVERFLOW_HEADER).get_all_values()
+    return analysis_store.backfill(store, sheet_values, overflow_values)
+
+def show_similar(text, kind, exclude_candidate=None):
+    hits = index.search(text, kind, k=similarity.TOP_K, exclude_candidate=exclude_candidate)
+    if not hits:
+        st.caption("No similar analyses indexed yet.")
+        return
+    st.dataframe(
+        [{"Similarity": h["similarity"], "Lokafyer": h["candidate"], "Interviewer": h["interviewer"],
+          "Time": h["timestamp"], "Score": h["total_score"], "Answer": h["text"]} for h in hits],
+        use_container_width=True,
+        hide_index=True
+    )
+
+def show_analysis(record):
+    st.markdown(f"**{record['candidate']}** · interviewed by {record['interviewer']} · {record['timestamp']} · "
+                f"**{record['total_score']}/30**")
+    st.markdown(f"**Q1.** {record['q1']}\n\n**Q2.** {record['q2']}\n\n**Q3.** {record['q3']}\n\n{record['q4']}")
+    with st.expander("📝 Transcript"):
+        st.text(record["transcript"])
+
+store = services.get_analysis_store()
+index = services.get_similarity_index()
+
+# ----------------------------
+# App UI
+# ----------------------------
+st.title("🔎 Search & History")
+st.caption(f"{store.count():,} analyses stored locally.")
+
+query = st.text_input("Search transcripts and answers", key="history_query")
+fcol1, fcol2 = st.columns(2)
+with fcol1:
+    candidate = st.selectbox("Lokafyer", [""] + store.candidates(), key="history_candidate")
+    date_from = st.date_input("From", value=None, key="history_from")
+with fcol2:
+    interviewer = st.selectbox("Interviewer", [""] + store.interviewers(), key="history_interviewer")
+    date_to = st.date_input("To", value=None, key="history_to")
+min_score = st.slider("Minimum total score", 0, 30, 0, key="history_min_score")
+
+results = store.search(query, candidate, interviewer, date_from, date_to, min_score)
+st.dataframe(
+    [{"Time": r["timestamp"], "Lokafyer": r["candidate"], "Interviewer": r["interviewer"], "Score": r["total_score"]} for r in results],
+    use_container_width=True,
+    hide_index=True
+)
+
+if results:
+    labels = {r["id"]: f"{r['timestamp']} · {r['candidate']} ({r['total_score']}/30)" for r in results}
+    selected = st.selectbox("Open analysis", list(labels), format_func=labels.get, key="history_selected")
+    record = store.get(selected)
+    show_analysis(record)
+    st.subheader("🧭 Similar past candidates")
+    st.caption("By tour plan (Q3)")
+    show_similar(record["q3"] or "", "tour_plan", exclude_candidate=record["candidate"])
+    st.caption("By the whole write-up (summary, readiness, tour plan and local knowledge)")
+    show_similar(similarity.texts_for(record)["overall"], "overall", exclude_candidate=record["candidate"])
+
+with st.expander("🧭 Find candidates by tour idea"):
+    idea = st.text_input("Describe a tour plan, e.g. neighborhoods or themes", key="history_similar_text")
+    if idea:
+        show_similar(idea, "tour_plan")
+
+if candidate:
+    st.subheader(f"📈 {candidate}'s history")
+    history = store.history(candidate)
+    st.line_chart({"Total score": [h["total_score"] or 0 for h in history]})
+    st.dataframe(history, use_container_width=True, hide_index=True)
+
+with st.expander("⬇️ Import past analyses from Google Sheets"):
+    st.caption("Reads the interview, month archive and overflow sheets once and adds any rows not stored yet.")
+    if st.button("Import now"):
+        with st.spinner("Reading Google Sheets..."):
+            added, skipped = import_from_sheet()
+        st.success(f"✅ Imported {added} analyses.")
+        if skipped:
+            st.warning(f"⚠️ Skipped {skipped} rows whose archived text isn't on the '{archive.TEXT_ARCHIVE_SHEET_NAME}' sheet.")
+    st.caption(f"{len(index):,} analyses in the similarity index.")
+    if st.button("Index stored analyses"):
+        with st.spinner("Embedding analyses..."):
+            indexed = similarity.backfill(index, store)
+        st.success(f"✅ Indexed {indexed} analyses.")
@@ -0,0 +1,200 @@
+import streamlit as st
+import time
+
+import consensus
+import interview_job
+import jobs
+import preprocess
+import services
+import sheet_writer
+import transcript_files
+
+# ----------------------------
+# Helper Functions
+# ----------------------------
+def clear_all_fields():
+    st.session_state.interviewer = ""
+    st.session_state.candidate_name = ""
+    st.session_state.transcript = ""
+    st.session_state.pop("last_analysis", None)
+    remove_uploaded_transcript()
+
+def remove_uploaded_transcript():
+    # A new uploader key is the only way to empty a file_uploader
+    st.session_state.pop("uploaded_transcript", None)
+    st.session_state.upload_key = st.session_state.get("upload_key", 0) + 1
+
+def load_uploaded_transcript(upload):
+    # Parsed once per file; only the compact turns stay in the session
+    stored = st.session_state.get("uploaded_transcript")
+    if stored and stored["file_id"] == upload.file_id:
+        return
+    try:
+        turns = transcript_files.parse(upload.name, upload)
+    except transcript_files.TranscriptFileError as e:
+        st.error(f"Couldn't read {upload.name}: {e}")
+        return
+    st.session_state.uploaded_transcript = {
+        "file_id": upload.file_id,
+        "name": upload.name,
+        "turns": turns,
+        "speakers": sorted({speaker for speaker, _ in turns if speaker}),
+        "chars": sum(len(text) for _, text in turns),
+    }
+
+def current_transcript():
+    stored = st.session_state.get("uploaded_transcript")
+    if stored:
+        return preprocess.join_turns(stored["turns"])
+    return st.session_state.get("transcript", "")
+
+def cancel_analysis():
+    services.get_job_runner().cancel(st.session_state.get("analysis_job"))
+
+def show_last_analysis(result):
+    st.subheader("🧠 AI Analysis")
+    if result["from_cache"]:
+        st.caption("⚡ Loaded from the analysis cache")
+    for note in result.get("notes", []):
+        st.info(note)
+    st.markdown(result["markdown"])
+    if result.get("write_id"):
+        show_write_status(result["write_id"])
+        st.markdown("📄 [View Interview Sheet on Google Sheets](https://docs.google.com/spreadsheets/d/1bHODbSJmSZpl3iXPovuUDVTFrWph5xwP426OOHvWr08/edit?usp=sharing)")
+
+@st.fragment(run_every=2)
+def show_write_status(write_id):
+    writer = services.get_sheet_writer()
+    status = writer.status(write_id)
+    if status == sheet_writer.PERSISTED:
+        st.success("✅ Saved to Google Sheets!")
+    elif status == sheet_writer.FAILED:
+        st.error(f"❌ Google Sheets rejected this row; it was set aside in {writer.dead_letter_path}.")
+    elif writer.last_error:
+        st.warning(f"🕒 Queued: Google Sheets is refusing writes right now, will keep retrying. ({writer.last_error})")
+    else:
+        st.info("🕒 Queued for Google Sheets…")
+
+@st.fragment(run_every=1)
+def show_job(job_id):
+    # Polls the background job; the whole page reruns once it has finished
+    job = services.get_job_runner().get(job_id)
+    if job is None or job.done:
+        st.rerun()
+
+    st.subheader("🧠 AI Analysis")
+    if job.status == jobs.QUEUED:
+        st.info("🕒 Waiting for a free slot, other analyses are running…")
+    elif job.partial:
+        st.markdown(job.progress)
+        st.markdown(job.partial + " ▌")
+    else:
+        st.info(f"⏳ {job.progress or 'Analyzing transcript...'}")
+    st.button("⏹️ Cancel", on_click=cancel_analysis)
+
+def collect_job(job_id):
+    job = services.get_job_runner().get(job_id)
+    del st.session_state["analysis_job"]
+    if job is None:
+        st.warning("The analysis was lost (the server restarted). Please run it again.")
+    elif job.status == jobs.DONE:
+        st.session_state.last_analysis = job.result
+    else:
+        st.warning(f"⚠️ {job.error}")
+
+# ----------------------------
+# API Keys and setup
+# ----------------------------
+setup_start = time.perf_counter()
+model, _ = services.get_services()
+setup_seconds = time.perf_counter() - setup_start
+
+# ----------------------------
+# App UI
+# ----------------------------
+st.title("🎤 Lokafy Interview Analysis")
+
+st.text_input("👤 Interviewer's Name", key="interviewer")
+st.text_input("🧍 Lokafyer's Name", key="candidate_name")
+upload = st.file_uploader(
+    "📎 Upload the transcript (VTT, SRT, DOCX, TXT or JSON export)",
+    type=list(transcript_files.EXTENSIONS),
+    key=f"transcript_file_{st.session_state.get('upload_key', 0)}"
+)
+if upload is not None:
+    load_uploaded_transcript(upload)
+
+uploaded = st.session_state.get("uploaded_transcript")
+if uploaded:
+    speakers = ", ".join(uploaded["speakers"]) or "no speaker labels"
+    st.caption(f"📄 {uploaded['name']}: {len(uploaded['turns']):,} turns, {uploaded['chars']:,} characters ({speakers})")
+    with st.expander("Preview"):
+        st.text(preprocess.join_turns(uploaded["turns"][:20]))
+    st.button("✖️ Remove file", on_click=remove_uploaded_transcript)
+else:
+    st.text_area("📝 …or paste the call transcript", key="transcript")
+
+col1, col2, col3 = st.columns([1, 4, 1])
+
+with col1:
+    st.button("🧹 Clear", on_click=clear_all_fields)
+
+with col3:
+    analyze_clicked = st.button("🔍 Analyze", disabled="analysis_job" in st.session_state)
+
+structured_mode = st.toggle("🧩 Structured scores (JSON)", value=True, help="Ask Gemini for schema-checked JSON instead of scraping scores out of free text.")
+# JSON replies aren't streamed, so the toggle shows off while structured is on
+stream_mode = st.toggle(
+    "⚡ Stream results as they arrive",
+    value=not structured_mode,
+    disabled=structured_mode,
+    help="Not available with structured scores." if structured_mode else None
+)
+preprocessing = st.selectbox(
+    "✂️ Transcript cleanup",
+    preprocess.MODES,
+    index=preprocess.MODES.index(preprocess.DEFAULT_MODE),
+    help="light: drop timestamps, caption repeats and repeated speaker labels · standard: also filler words · aggressive: also the interviewer's long monologues"
+)
+consensus_mode = st.toggle(
+    "🗳️ Consensus scoring",
+    value=False,
+    help=f"Score with {len(consensus.CONFIGS)} model/temperature settings at once and keep the median per category. Costs {len(consensus.CONFIGS)}× the tokens."
+)
+force_reanalyze = st.checkbox("🔁 Force re-analyze (ignore cached result)")
+
+# ----------------------------
+# Analyze Button & Logic
+# ----------------------------
+# The analysis runs as a background job, so navigating away or touching a
+# widget mid-analysis doesn't lose it or its sheet row.
+if analyze_clicked:
+    if not st.session_state["interviewer"] or not st.session_state["candidate_name"] or not current_transcript():
+        st.warning("Please fill in all fields.")
+    else:
+        st.session_state.pop("last_analysis", None)
+        job = services.get_job_runner().submit(
+            interview_job.run,
+            model,
+            st.session_state["interviewer"],
+            st.session_state["candidate_name"],
+            current_transcript(),
+            structured=structured_mode,
+            stream=stream_mode and not structured_mode,
+            force=force_reanalyze,
+            setup_seconds=setup_seconds,
+            preprocessing=preprocessing,
+            consensus_mode=consensus_mode
+        )
+        st.session_state.analysis_job = job.id
+
+if "analysis_job" in st.session_state:
+    job = services.get_job_runner().get(st.session_state.analysis_job)
+    if job is not None and not job.done:
+        show_job(job.id)
+    else:
+        collect_job(st.session_state.analysis_job)
+
+if "analysis_job" not in st.session_state and st.session_state.get("last_analysis"):
+    # Keep the last result on screen across reruns without another API call
+    show_last_analysis(st.session_state.last_analysis)
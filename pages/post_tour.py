@@ -0,0 +1,3 @@
+import call_review
+
+call_review.render("🎤 Lokafy Post-tour Call Analysis", "Post-tour Calls", key="post_tour")
@@ -0,0 +1,87 @@
+import datetime
+import threading
+import time
+
+import google.generativeai as genai
+from google.generativeai import caching
+
+# ----------------------------
+# Prompt Prefix Caching
+# ----------------------------
+# Every analysis prompt starts with the same rubric instructions. This
+# wraps a GenerativeModel so that prompts starting with a registered prefix
+# are sent as "cached prefix + the rest": the prefix is uploaded once as
+# Gemini cached content and each call pays only for the candidate section.
+# Prefixes under the model's minimum for explicit caching are never sent to
+# the cache API (they're counted once, then left alone); if a create fails
+# the full prompt is sent as before, which still benefits from Gemini's
+# implicit caching of repeated prefixes. Creating a cache is a slow network
+# call, so it runs outside the lock: while one thread creates it, other
+# calls with the same prefix go out uncached instead of waiting.
+
+CACHE_TTL = datetime.timedelta(hours=1)
+REFRESH_MARGIN = 300  # seconds before expiry to recreate the cache
+RETRY_AFTER = 3600  # seconds to wait before retrying a prefix that failed
+# Smallest prefix, in tokens, each model accepts for explicit caching
+MIN_TOKENS = {"gemini-2.5-flash": 1024, "gemini-2.5-pro": 4096}
+DEFAULT_MIN_TOKENS = 4096
+
+
+class PrefixCachingModel:
+    def __init__(self, model, prefixes):
+        self.model = model
+        self.model_name = model.model_name
+        self.prefixes = list(prefixes)
+        self._cached = {}  # prefix -> (model or None, expires_at)
+        self._creating = set()  # prefixes being created right now
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def _min_tokens(self):
+        return MIN_TOKENS.get(self.model_name.split("/")[-1], DEFAULT_MIN_TOKENS)
+
+    def _create(self, prefix):
+        # Returns the (model or None, expires_at) entry for prefix
+        try:
+            if self.model.count_tokens(prefix).total_tokens < self._min_tokens():
+                return None, float("inf")
+            content = caching.CachedContent.create(
+                model=self.model_name,
+                contents=[prefix],
+                ttl=CACHE_TTL,
+                display_name="lokafy-rubric-prefix",
+            )
+            return genai.GenerativeModel.from_cached_content(content), time.time() + CACHE_TTL.total_seconds()
+        except Exception:
+            return None, time.time() + RETRY_AFTER
+
+    def _cached_model(self, prefix):
+        with self._lock:
+            entry = self._cached.get(prefix)
+            if entry and time.time() < entry[1] - REFRESH_MARGIN:
+                return entry[0]
+            if prefix in self._creating:
+                # Someone else is (re)creating it; an unexpired one still works
+                return entry[0] if entry and time.time() < entry[1] else None
+            self._creating.add(prefix)
+        entry = None
+        try:
+            entry = self._create(prefix)
+        finally:
+            with self._lock:
+                if entry:
+                    self._cached[prefix] = entry
+                self._creating.discard(prefix)
+        return entry[0]
+
+    def generate_content(self, prompt, **kwargs):
+        if isinstance(prompt, str):
+            for prefix in self.prefixes:
+                if prompt.startswith(prefix):
+                    cached = self._cached_model(prefix)
+                    if cached is not None:
+                        return cached.generate_content(prompt[len(prefix):], **kwargs)
+                    break
+        return self.model.generate_content(prompt, **kwargs)
@@ -0,0 +1,219 @@
+import re
+
+import chunking
+
+# ----------------------------
+# Transcript Preprocessing
+# ----------------------------
+# Pasted transcripts carry a lot that Gemini doesn't need: timestamps,
+# caption cue numbers, "um"s, the same speaker label on every line and
+# auto-caption lines repeated as they roll. This cleans them up line by
+# line (a chain of generators, so even very long transcripts stream
+# through) before the prompt is built. The sheet still gets the original.
+#
+# Modes, each including the one before:
+#   off        - send the transcript as pasted
+#   light      - speaker-label timestamps, caption cues, caption repeats,
+#                merged speaker turns
+#   standard   - also filler words and stutters
+#   aggressive - also replaces the interviewer's long monologues with a marker
+
+MODES = ("off", "light", "standard", "aggressive")
+DEFAULT_MODE = "standard"
+
+# Interviewer turns longer than this many words count as a monologue
+MONOLOGUE_WORDS = 120
+
+# Shorter lines are only dropped as caption repeats when identical
+MIN_OVERLAP_CHARS = 12
+
+TIMESTAMP = r"\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?"
+# With seconds, or in brackets: "9:30" on its own is more likely a time of day
+CLOCK = rf"(?:\d{{1,2}}:\d{{2}}:\d{{2}}(?:[.,]\d{{1,3}})?|[\[(]{TIMESTAMP}[\])])"
+CUE_TIMING = re.compile(rf"^\s*{TIMESTAMP}\s*-->\s*{TIMESTAMP}.*$")
+CUE_NUMBER = re.compile(r"^\s*\d+\s*$")
+WEBVTT = re.compile(r"^\s*WEBVTT\b")
+CAPTION_NOTE = re.compile(r"^\s*NOTE\b")
+CAPTION_HEADER = re.compile(r"^\s*(?:Kind|Language):")
+SPEAKER_LABEL = re.compile(r"^([A-Z][^\W\d_]*(?:[ .'\-]+[^\W\d_]+){0,4})\s*:(?:\s+(.*)|$)")
+# A name on its own, every word capitalised ("Anna Lee"), as Zoom and Meet
+# exports put above each turn next to its timestamp
+BARE_LABEL = re.compile(r"^[A-Z][\w.'\-]*(?: [A-Z][\w.'\-]*){0,3}$")
+# Timestamps are only removed where they sit next to a speaker label:
+# "[00:01:02] Name: text", "Name (00:01): text", "Name  00:01:02"
+LEADING_TIMESTAMP = re.compile(rf"^\s*[\[(]?{TIMESTAMP}[\])]?\s+(.*)$")
+LABEL_TIMESTAMP = re.compile(rf"^([^:\[(]+?)\s*[\[(]?{TIMESTAMP}[\])]?\s*:(?!\d)(.*)$")
+TRAILING_CLOCK = re.compile(rf"^(.*?)\s+{CLOCK}\s*$")
+LEADING_CLOCK = re.compile(rf"^\s*{CLOCK}\s+(.*)$")
+FILLER = re.compile(r"\b(?:u+h+m*|u+m+|e+r+m+|hm+|mm+-?hm+|ah+)\b[,.]?\s*", re.IGNORECASE)
+# Only short function words count as stutters ("I I", "the the"); other
+# repeats are emphasis ("very very") or names ("Walla Walla")
+STUTTER_WORDS = ("i", "i'm", "a", "an", "the", "and", "but", "or", "so", "to", "of", "in", "on", "at", "for",
+                 "it", "it's", "is", "we", "we're", "you", "they", "he", "she", "that", "this", "my", "our", "like")
+STUTTER = re.compile(
+    r"\b({})(?:[,\s]+\1\b)+".format("|".join(sorted(STUTTER_WORDS, key=len, reverse=True))), re.IGNORECASE
+)
+
+
+def _lines(text):
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text)
+        yield text[start:end].rstrip("\r")
+        start = end + 1
+
+
+def _is_name(text):
+    return bool(BARE_LABEL.match(text.strip()))
+
+
+def _strip_label_timestamp(line):
+    # "[00:01:02] Name: text" -> "Name: text"
+    match = LEADING_TIMESTAMP.match(line)
+    if match:
+        label = SPEAKER_LABEL.match(match.group(1))
+        if label and _is_name(label.group(1)):
+            return match.group(1)
+    # "Name (00:01): text" -> "Name: text"
+    match = LABEL_TIMESTAMP.match(line)
+    if match and _is_name(match.group(1)):
+        return f"{match.group(1).strip()}:{match.group(2)}"
+    # "Name  00:01:02" or "00:01:02 Name" alone on a line -> "Name:"
+    match = TRAILING_CLOCK.match(line) or LEADING_CLOCK.match(line)
+    if match and _is_name(match.group(1)):
+        return match.group(1).strip() + ":"
+    return line
+
+
+def strip_timing(lines):
+    # Cue numbers only count as such right before a cue timing line, and
+    # caption headers and notes only in a WEBVTT file; in free text a line
+    # like "3" is an answer
+    pending = None
+    webvtt = header = False
+    for line in lines:
+        if CUE_TIMING.match(line):
+            pending = None
+            header = False
+            continue
+        if pending is not None:
+            yield pending
+            pending = None
+        if WEBVTT.match(line):
+            webvtt = header = True
+            continue
+        if CUE_NUMBER.match(line):
+            pending = line.strip()
+            continue
+        if (webvtt and CAPTION_NOTE.match(line)) or (header and CAPTION_HEADER.match(line)):
+            continue
+        stripped = _strip_label_timestamp(line).strip()
+        if stripped:
+            yield stripped
+    if pending is not None:
+        yield pending
+
+
+def dedupe_captions(lines):
+    # Rolling captions repeat a line, or repeat it with a few words added
+    previous = None
+    for line in lines:
+        if previous is not None:
+            if line == previous or (len(line) >= MIN_OVERLAP_CHARS and previous.endswith(line)):
+                continue
+            if len(previous) >= MIN_OVERLAP_CHARS and line.startswith(previous):
+                previous = line
+                continue
+            yield previous
+        previous = line
+    if previous is not None:
+        yield previous
+
+
+def _unstutter(match):
+    # A capitalised repeat is a name ("A A Milne"), so leave it; "I" is the
+    # one word that's always capitalised
+    repeats = re.split(r"[,\s]+", match.group(0))[1:]
+    if any(word != word.lower() and word != "I" for word in repeats):
+        return match.group(0)
+    return match.group(1)
+
+
+def strip_filler(lines):
+    for line in lines:
+        line = FILLER.sub("", line)
+        line = STUTTER.sub(_unstutter, line)
+        line = re.sub(r"\s{2,}", " ", line).strip()
+        if line and re.search(r"\w", line):
+            yield line
+
+
+def speaker_turns(lines):
+    # Yields (speaker, text) with consecutive lines by the same speaker
+    # merged; lines before any label keep their own (None, line) turns
+    speaker, parts = None, []
+    for line in lines:
+        label = SPEAKER_LABEL.match(line)
+        if label:
+            name, text = label.group(1).strip(), (label.group(2) or "").strip()
+        elif speaker is None:
+            yield None, line
+            continue
+        else:
+            name, text = speaker, line
+        if name != speaker:
+            if parts:
+                yield speaker, " ".join(parts)
+            speaker, parts = name, []
+        if text:
+            parts.append(text)
+    if parts:
+        yield speaker, " ".join(parts)
+
+
+def _name(text):
+    # "Anna  Lee." and "anna lee" are the same label
+    return " ".join(re.findall(r"[^\W_]+", text.casefold()))
+
+
+def drop_monologues(turns, interviewer, max_words=MONOLOGUE_WORDS):
+    # Only turns labelled with the interviewer's full name count; sharing a
+    # first name with the candidate isn't enough
+    name = _name(interviewer or "")
+    for speaker, text in turns:
+        is_interviewer = bool(name) and bool(speaker) and _name(speaker) == name
+        words = len(text.split())
+        if is_interviewer and words > max_words:
+            text = f"[{speaker} speaks for ~{words} words]"
+        yield speaker, text
+
+
+def join_turns(turns):
+    return "\n".join(f"{speaker}: {text}" if speaker else text for speaker, text in turns)
+
+
+def preprocess(transcript, mode=DEFAULT_MODE, interviewer=""):
+    # Returns (text for the prompt, stats)
+    if mode not in MODES:
+        raise ValueError(f"Unknown preprocessing mode: {mode}")
+    if mode == "off":
+        cleaned = transcript
+    else:
+        lines = dedupe_captions(strip_timing(_lines(transcript)))
+        if mode in ("standard", "aggressive"):
+            lines = strip_filler(lines)
+        turns = speaker_turns(lines)
+        if mode == "aggressive":
+            turns = drop_monologues(turns, interviewer)
+        cleaned = join_turns(turns)
+
+    tokens_before = len(transcript) // chunking.CHARS_PER_TOKEN
+    tokens_after = len(cleaned) // chunking.CHARS_PER_TOKEN
+    return cleaned, {
+        "mode": mode,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
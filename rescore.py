@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import analysis
+import batch
+import config
+from sheet_reader import HEADER_ROWS, column_letter
+
+# ----------------------------
+# Bulk Re-scoring
+# ----------------------------
+# When the rubric prompt changes, older rows keep scores from the old
+# wording. This walks the local analysis store a page at a time, re-runs
+# each transcript through the current prompt on a rate-limited thread pool
+# (the same worker as batch analysis), and writes the new scores next to
+# the old ones in columns labelled with the prompt version, one
+# batch_update per sheet per page. Those columns go after the block kept
+# for meta columns (analysis.META_BLOCK). A checkpoint is saved after every
+# page, so an interrupted run picks up where it stopped:
+#
+#     python rescore.py --workers 4 --per-minute 20
+
+PAGE_SIZE = 50
+WORKERS = batch.MAX_WORKERS
+REQUESTS_PER_MINUTE = batch.REQUESTS_PER_MINUTE
+
+# Header of a column written by version_columns()
+VERSIONED = re.compile(r"^(?:{}) \[.+\]$".format("|".join(map(re.escape, analysis.RUBRIC_KEYS + ["Total Score"]))))
+
+
+def version_columns(version):
+    return [f"{key} [{version}]" for key in analysis.RUBRIC_KEYS] + [f"Total Score [{version}]"]
+
+
+def checkpoint_path(version):
+    slug = re.sub(r"\W+", "_", version)
+    return config.data_path(f"rescore_{slug}.json")
+
+
+def load_checkpoint(path, version):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            checkpoint = json.load(fh)
+        if checkpoint.get("version") == version:
+            return checkpoint
+    return {"version": version, "last_id": 0, "rescored": 0, "skipped": 0, "failed": {}}
+
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(checkpoint, fh)
+    os.replace(tmp_path, path)
+
+
+def reserve_meta_block(sheet):
+    # Sheets re-scored before a meta column was added can have versioned
+    # columns where it now goes. Those are moved past the meta block (cells
+    # already holding an Analysis Key stay put) and the meta column names
+    # are written into the header. Returns the header row as it now is.
+    header = sheet.row_values(1)
+    start, end = analysis.META_START, analysis.EXTRA_COLUMNS_START
+    names = analysis.META_COLUMNS + [""] * (analysis.META_BLOCK - len(analysis.META_COLUMNS))
+    moved = [i for i in range(start, min(len(header), end)) if VERSIONED.match(header[i])]
+    if not moved:
+        return header
+    first = max(len(header), end)
+    if max(first + len(moved), end) > sheet.col_count:
+        sheet.add_cols(max(first + len(moved), end) - sheet.col_count)
+    columns = sheet.batch_get([f"{column_letter(i)}{HEADER_ROWS + 1}:{column_letter(i)}" for i in moved])
+    data = []
+    new_header = header + [""] * (first + len(moved) - len(header))
+    for target, (index, cells) in enumerate(zip(moved, columns), start=first):
+        values = [row[0] if row else "" for row in cells]
+        keep = [index == analysis.ANALYSIS_KEY_COLUMN and bool(analysis.ANALYSIS_KEY_PATTERN.match(v)) for v in values]
+        new_header[target] = header[index]
+        if values:
+            last = HEADER_ROWS + len(values)
+            data.append({"range": f"{column_letter(target)}{HEADER_ROWS + 1}:{column_letter(target)}{last}",
+                         "values": [["" if k else v] for v, k in zip(values, keep)]})
+            data.append({"range": f"{column_letter(index)}{HEADER_ROWS + 1}:{column_letter(index)}{last}",
+                         "values": [[v if k else ""] for v, k in zip(values, keep)]})
+    for i, name in enumerate(names, start=start):
+        if i in moved or not new_header[i]:
+            new_header[i] = name
+    data.append({"range": f"A1:{column_letter(len(new_header) - 1)}1", "values": [new_header]})
+    sheet.batch_update(data, value_input_option="RAW")
+    return new_header
+
+
+class SheetTarget:
+    # One worksheet: where each analysis sits and where the versioned
+    # columns start (they're added after the last column, past the meta
+    # block, on first use)
+
+    def __init__(self, sheet, version):
+        self.sheet = sheet
+        columns = version_columns(version)
+        header = reserve_meta_block(sheet)
+        if columns[0] in header:
+            self.first = header.index(columns[0])
+        else:
+            self.first = max(len(header), analysis.EXTRA_COLUMNS_START)
+            if self.first + len(columns) > sheet.col_count:
+                sheet.add_cols(self.first + len(columns) - sheet.col_count)
+            sheet.batch_update([{"range": self._range(1), "values": [columns]}])
+        # Rows are found by Analysis Key; ones written before that column
+        # existed by timestamp and names
+        key_letter = column_letter(analysis.ANALYSIS_KEY_COLUMN)
+        names, keys = sheet.batch_get([f"A{HEADER_ROWS + 1}:C", f"{key_letter}{HEADER_ROWS + 1}:{key_letter}"])
+        keys = list(keys) + [[]] * (len(names) - len(keys))
+        self.rows = {}
+        for n, (cells, key) in enumerate(zip(names, keys), start=HEADER_ROWS + 1):
+            self.rows[key[0] if key and key[0] else tuple(cells[:3])] = n
+
+    def find(self, record):
+        number = self.rows.get(record.get("analysis_key"))
+        return number or self.rows.get((str(record["timestamp"]), record["interviewer"], record["candidate"]))
+
+    def _range(self, row):
+        last = self.first + len(analysis.RUBRIC_KEYS)
+        return f"{column_letter(self.first)}{row}:{column_letter(last)}{row}"
+
+    def update(self, row, result):
+        values = [result.scores.get(key, "") for key in analysis.RUBRIC_KEYS] + [result.total_score]
+        return {"range": self._range(row), "values": [values]}
+
+
+def _is_current(record):
+    return (record.get("prompt_version") or "").split("/")[0] == analysis.PROMPT_VERSION
+
+
+def _analyze(model, model_name, item, limiter, cache, metrics_store):
+    # One bad transcript shouldn't stop the page
+    try:
+        batch.analyze_item(model, model_name, item, limiter, cache, True, metrics_store)
+    except Exception as e:
+        item["result"] = None
+        item["error"] = str(e)
+
+
+def rescore(store, model, model_name, open_sheets, path=None, page_size=PAGE_SIZE, workers=WORKERS,
+            per_minute=REQUESTS_PER_MINUTE, limit=None, include_current=False, retry_failed=False,
+            cache=None, metrics_store=None, log=print):
+    # open_sheets() returns the worksheets to write to (live sheet and month
+    # archives); it's called every page so row numbers stay current
+    version = analysis.PROMPT_VERSION
+    path = path or checkpoint_path(version)
+    checkpoint = load_checkpoint(path, version)
+    limiter = batch.RateLimiter(per_minute)
+    retries = sorted(int(i) for i in checkpoint["failed"])
+    processed = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rescore") as executor:
+        while limit is None or processed < limit:
+            size = page_size if limit is None else min(page_size, limit - processed)
+            if retry_failed:
+                records = [r for r in (store.get(i) for i in retries[:size]) if r]
+                retries = retries[size:]
+            else:
+                records = store.page(checkpoint["last_id"], size)
+            if not records:
+                break
+            todo = [r for r in records if include_current or retry_failed or not _is_current(r)]
+            checkpoint["skipped"] += len(records) - len(todo)
+
+            items = [batch.new_item(r["id"], r["interviewer"], r["candidate"], r["transcript"]) for r in todo]
+            list(executor.map(lambda item: _analyze(model, model_name, item, limiter, cache, metrics_store), items))
+
+            targets = [SheetTarget(sheet, version) for sheet in open_sheets()]
+            updates = {}
+            for record, item in zip(todo, items):
+                failed = (item["error"] or "analysis failed") if item["result"] is None else None
+                if not failed:
+                    target = next((t for t in targets if t.find(record)), None)
+                    if target is None:
+                        failed = "row not found in the sheet"
+                    else:
+                        updates.setdefault(id(target), (target, []))[1].append(
+                            target.update(target.find(record), item["result"]))
+                if failed:
+                    checkpoint["failed"][str(record["id"])] = failed
+                else:
+                    checkpoint["failed"].pop(str(record["id"]), None)
+                    checkpoint["rescored"] += 1
+            for target, data in updates.values():
+                target.sheet.batch_update(data, value_input_option="RAW")
+
+            if not retry_failed:
+                checkpoint["last_id"] = records[-1]["id"]
+            save_checkpoint(path, checkpoint)
+            processed += len(records)
+            log(f"{checkpoint['rescored']:,} rescored, {checkpoint['skipped']:,} already current, "
+                f"{len(checkpoint['failed']):,} failed (up to #{records[-1]['id']})")
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score stored interviews with the current rubric prompt.")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="analyses per page and checkpoint")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--per-minute", type=int, default=REQUESTS_PER_MINUTE, help="Gemini requests per minute")
+    parser.add_argument("--limit", type=int, help="stop after this many analyses")
+    parser.add_argument("--all", action="store_true", help="also re-score rows already on the current prompt")
+    parser.add_argument("--retry-failed", action="store_true", help="only retry analyses that failed last time")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the beginning")
+    args = parser.parse_args(argv)
+
+    import services
+
+    path = checkpoint_path(analysis.PROMPT_VERSION)
+    if args.restart and os.path.exists(path):
+        os.remove(path)
+
+    def open_sheets():
+        return [services.get_sheet()] + [services.get_worksheet(title) for title in services.month_archive_titles()]
+
+    checkpoint = rescore(
+        services.get_analysis_store(),
+        services.get_model(),
+        services.MODEL_NAME,
+        open_sheets,
+        path=path,
+        page_size=args.page_size,
+        workers=args.workers,
+        per_minute=args.per_minute,
+        limit=args.limit,
+        include_current=args.all,
+        retry_failed=args.retry_failed,
+        cache=services.get_analysis_cache(),
+        metrics_store=services.get_metrics_store()
+    )
+    for analysis_id, error in sorted(checkpoint["failed"].items(), key=lambda item: int(item[0])):
+        print(f"  #{analysis_id}: {error}", file=sys.stderr)
+    print(f"Scores are in the '{version_columns(analysis.PROMPT_VERSION)[-1]}' columns. Checkpoint: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import re
+import time
+from collections import deque
+
+import streamlit as st
+
+import analysis
+import archive
+import config
+import templates
+from analysis_cache import AnalysisCache
+from analysis_store import AnalysisStore
+from jobs import JobRunner
+from metrics import MetricsStore
+from sheet_reader import SheetReader
+from sheet_writer import SheetWriter, is_retryable
+
+# ----------------------------
+# Shared Google resources
+# ----------------------------
+# Streamlit re-runs the whole script on every widget change, so anything
+# expensive (API configuration, OAuth token exchange, Drive lookup of the
+# sheet) is built once per process here and shared by every session and
+# page. The Google libraries themselves are only imported on first use, so
+# the login screen doesn't pay for them.
+
+MODEL_NAME = "gemini-2.5-pro"
+SHEET_NAME = "Lokafy Interview Sheet"
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# Status codes that mean our token or sheet handle has gone stale
+AUTH_ERROR_CODES = (401, 403)
+
+OVERFLOW_HEADER = ("Transcript ID", "Part", "Total Parts", "Transcript")
+
+# Templates whose static prefix is worth caching on the Gemini side
+CACHED_PREFIX_TEMPLATES = ("post_tour",)
+
+_timings = {
+    "cold": None,
+    "warm": deque(maxlen=100),
+    "first_render": None,
+    "renders": deque(maxlen=100),
+}
+
+
+@st.cache_resource(show_spinner=False)
+def get_model(model_name=MODEL_NAME):
+    import google.generativeai as genai
+    from gemini_client import ResilientModel
+    from prefix_cache import PrefixCachingModel
+
+    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
+    # Analysis prompts share a static rubric prefix; let Gemini cache it
+    prefixes = [analysis.prompt_prefix(structured) for structured in (False, True)]
+    prefixes += [templates.load(name).prefix() for name in CACHED_PREFIX_TEMPLATES]
+    fallback = None
+    if config.FALLBACK_MODEL and config.FALLBACK_MODEL != model_name:
+        fallback = PrefixCachingModel(genai.GenerativeModel(config.FALLBACK_MODEL), prefixes)
+    return ResilientModel(
+        PrefixCachingModel(genai.GenerativeModel(model_name), prefixes),
+        fallback=fallback,
+        deadline=config.GEMINI_DEADLINE,
+        fallback_after=config.FALLBACK_AFTER or None,
+        hedge=config.HEDGE_REQUESTS
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _get_credentials():
+    from google.oauth2.service_account import Credentials
+
+    return Credentials.from_service_account_info(st.secrets["gsheets"], scopes=SCOPES)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_client():
+    import gspread
+
+    return gspread.authorize(_get_credentials())
+
+
+@st.cache_resource(show_spinner=False)
+def _get_spreadsheet():
+    return _get_client().open(SHEET_NAME)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_worksheet(title=None, header=None):
+    import gspread
+
+    spreadsheet = _get_spreadsheet()
+    if title is None:
+        import rescore
+
+        # Move any re-score columns out of the way of the meta columns
+        sheet = spreadsheet.sheet1
+        rescore.reserve_meta_block(sheet)
+        return sheet
+    try:
+        return spreadsheet.worksheet(title)
+    except gspread.exceptions.WorksheetNotFound:
+        sheet = spreadsheet.add_worksheet(title, rows=1000, cols=len(header or ()) or 26)
+        if header:
+            sheet.append_row(list(header))
+        return sheet
+
+
+@st.cache_resource(show_spinner=False)
+def get_analysis_cache():
+    return AnalysisCache()
+
+
+@st.cache_resource(show_spinner=False)
+def get_analysis_store():
+    return AnalysisStore()
+
+
+@st.cache_resource(show_spinner=False)
+def get_text_archive():
+    return archive.TextArchive()
+
+
+@st.cache_resource(show_spinner=False)
+def get_similarity_index():
+    import similarity
+
+    if config.EMBEDDING_BACKEND == "gemini":
+        get_model()  # configures the API key
+    return similarity.EmbeddingIndex(similarity.get_embedder(config.EMBEDDING_BACKEND))
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    return JobRunner()
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics_store():
+    return MetricsStore()
+
+
+def _refresh_if_expired():
+    from google.auth.transport.requests import Request
+
+    creds = _get_credentials()
+    # A fresh service account credential has no token yet; gspread fetches it
+    # on the first request, so only refresh ones that have actually expired.
+    if creds.token and not creds.valid:
+        creds.refresh(Request())
+
+
+def get_worksheet(title=None, header=None):
+    # title=None is the main interview sheet; other worksheets are created
+    # (with the given header row) the first time they're needed
+    _refresh_if_expired()
+    return _get_worksheet(title, header)
+
+
+def get_sheet():
+    return get_worksheet()
+
+
+def reset_sheets():
+    _get_worksheet.clear()
+    _get_spreadsheet.clear()
+    _get_client.clear()
+    _get_credentials.clear()
+
+
+def _is_auth_error(error):
+    import gspread
+
+    return isinstance(error, gspread.exceptions.APIError) and error.response.status_code in AUTH_ERROR_CODES
+
+
+def _reset_on_auth_error(error):
+    if _is_auth_error(error):
+        reset_sheets()
+
+
+def _is_retryable_sheet_error(error):
+    # Token refreshes that fail on the network are worth retrying too
+    from google.auth.exceptions import TransportError
+
+    return is_retryable(error) or isinstance(error, TransportError)
+
+
+# Upsert keys per sheet title (None is the interview sheet)
+_KEY_COLUMNS = {None: analysis.ANALYSIS_KEY_COLUMN, archive.TEXT_ARCHIVE_SHEET_NAME: archive.TEXT_ARCHIVE_KEY}
+
+
+def _spool_name(title):
+    if title is None:
+        return "sheet_spool.jsonl"
+    return re.sub(r"\W+", "_", title.lower()).strip("_") + "_spool.jsonl"
+
+
+@st.cache_resource(show_spinner=False)
+def get_sheet_writer(title=None, header=None):
+    # The interview sheet upserts on the analysis key, so a re-submitted
+    # analysis replaces its row instead of adding another; the text archive
+    # likewise replaces the parts of its texts
+    main = title is None
+    return SheetWriter(
+        lambda: get_worksheet(title, header),
+        spool_path=config.data_path(_spool_name(title)),
+        on_error=_reset_on_auth_error,
+        on_flush=lambda rows, seconds, ok: get_metrics_store().record_flush(title or "Sheet1", rows, seconds, ok),
+        key_column=_KEY_COLUMNS.get(title),
+        on_update=(lambda rows: get_sheet_reader().invalidate()) if main else None,
+        retryable=_is_retryable_sheet_error
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_sheet_reader():
+    return SheetReader(get_sheet, on_error=_reset_on_auth_error)
+
+
+def get_overflow_writer():
+    return get_sheet_writer(analysis.OVERFLOW_SHEET_NAME, OVERFLOW_HEADER)
+
+
+def get_text_archive_writer():
+    return get_sheet_writer(archive.TEXT_ARCHIVE_SHEET_NAME, archive.TEXT_ARCHIVE_HEADER)
+
+
+def month_archive_titles():
+    titles = [ws.title for ws in _get_spreadsheet().worksheets()]
+    return sorted(t for t in titles if t.startswith(archive.MONTH_SHEET_PREFIX))
+
+
+def read_all_values():
+    # Every interview row, month archives first, with offloaded text restored;
+    # the live sheet's header row comes first, like get_all_values()
+    live = sheet_call("get_all_values")
+    values = [get_worksheet(title).get_all_values() for title in month_archive_titles()] + [live]
+    text_sheet = lambda: get_worksheet(archive.TEXT_ARCHIVE_SHEET_NAME, archive.TEXT_ARCHIVE_HEADER).get_all_values()
+    return live[:1] + archive.read_rows(values, get_text_archive(), text_sheet)
+
+
+def sheet_call(method, *args, **kwargs):
+    # Run a worksheet method, reopening the sheet once if auth has gone stale
+    try:
+        return getattr(get_sheet(), method)(*args, **kwargs)
+    except Exception as e:
+        if not _is_auth_error(e):
+            raise
+        reset_sheets()
+        return getattr(get_sheet(), method)(*args, **kwargs)
+
+
+def get_services():
+    start = time.perf_counter()
+    model = get_model()
+    sheet = get_sheet()
+    elapsed = time.perf_counter() - start
+
+    if _timings["cold"] is None:
+        _timings["cold"] = elapsed
+    else:
+        _timings["warm"].append(elapsed)
+    return model, sheet
+
+
+def is_admin():
+    # Admins are listed by username under `admins` in secrets.toml
+    return st.session_state.get("username") in st.secrets.get("admins", [])
+
+
+def record_render(seconds):
+    if _timings["first_render"] is None:
+        _timings["first_render"] = seconds
+    else:
+        _timings["renders"].append(seconds)
+
+
+def _avg_ms(values):
+    values = list(values)
+    return (sum(values) / len(values) * 1000) if values else None
+
+
+def startup_report():
+    return {
+        "cold_ms": (_timings["cold"] or 0) * 1000,
+        "warm_ms": _avg_ms(_timings["warm"]),
+        "warm_runs": len(_timings["warm"]),
+        "first_render_ms": (_timings["first_render"] or 0) * 1000,
+        "render_ms": _avg_ms(_timings["renders"]),
+    }
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+
+import analysis
+import config
+
+# ----------------------------
+# Incremental Sheet Reader
+# ----------------------------
+# Dashboards only need the timestamp, names and scores, not the transcript
+# and explanation cells that make up almost all of the sheet's bytes. This
+# reader fetches just those columns with one batch_get, remembers how many
+# rows it has seen and afterwards only asks for rows below that. Results
+# are served from memory for TTL seconds and snapshotted to disk, so a
+# restart picks up where the last sync stopped.
+
+TTL = 60
+HEADER_ROWS = 1
+
+# Column index in the sheet row (see AnalysisResult.to_row) for each field
+COLUMNS = {
+    "timestamp": 0,
+    "interviewer": 1,
+    "candidate": 2,
+    **{key: 8 + 2 * i for i, key in enumerate(analysis.RUBRIC_KEYS)},
+    "total_score": 8 + 2 * len(analysis.RUBRIC_KEYS),
+}
+NUMERIC = set(analysis.RUBRIC_KEYS) | {"total_score"}
+
+
+def column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def column_ranges(fields, start_row):
+    # Adjacent columns share one range (timestamp..candidate is "A2:C")
+    indexes = sorted(COLUMNS[f] for f in fields)
+    groups = []
+    for index in indexes:
+        if groups and groups[-1][-1] == index - 1:
+            groups[-1].append(index)
+        else:
+            groups.append([index])
+    return [
+        (group, f"{column_letter(group[0])}{start_row}:{column_letter(group[-1])}")
+        for group in groups
+    ]
+
+
+def _number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SheetReader:
+    def __init__(self, sheet_factory, fields=None, ttl=TTL, snapshot_path=None, on_error=None):
+        self.sheet_factory = sheet_factory
+        self.on_error = on_error
+        self.fields = list(fields or COLUMNS)
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path or config.data_path("sheet_snapshot.json")
+        self.rows = []
+        self.moved = 0  # rows moved off the live sheet, kept first (see archive.rotate)
+        self.synced_at = 0.0
+        self._stale = False
+        self.last_fetch = {"rows": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as fh:
+                snapshot = json.load(fh)
+        except (OSError, json.JSONDecodeError):
+            return  # a bad snapshot only costs one full read
+        if snapshot.get("fields") == self.fields:
+            self.rows = snapshot["rows"]
+            self.moved = snapshot.get("moved", 0)
+
+    def _save_snapshot(self):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"fields": self.fields, "rows": self.rows, "moved": self.moved}, fh)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _fetch(self, start_row):
+        ranges = column_ranges(self.fields, start_row)
+        try:
+            results = self.sheet_factory().batch_get([a1 for _, a1 in ranges])
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            raise
+        # Sheets trims trailing empty rows per range, so align on the longest
+        count = max((len(values) for values in results), default=0)
+        names = {index: field for field, index in COLUMNS.items()}
+        rows = [{} for _ in range(count)]
+        for (group, _), values in zip(ranges, results):
+            for n, cells in enumerate(values):
+                for offset, index in enumerate(group):
+                    value = cells[offset] if offset < len(cells) else ""
+                    field = names[index]
+                    rows[n][field] = _number(value) if field in NUMERIC else value
+        for row in rows:
+            for field in self.fields:
+                row.setdefault(field, None if field in NUMERIC else "")
+        return rows
+
+    def _sync(self, full):
+        if full:
+            self.rows = self.rows[:self.moved]
+        started = time.perf_counter()
+        new_rows = self._fetch(HEADER_ROWS + len(self.rows) - self.moved + 1)
+        self.rows.extend(new_rows)
+        self.last_fetch = {"rows": len(new_rows), "seconds": time.perf_counter() - started}
+        self.synced_at = time.time()
+        if new_rows or full:
+            self._save_snapshot()
+
+    def sync(self, full=False):
+        # full=True re-reads the live sheet, e.g. after rows were edited or
+        # deleted; rows already moved to the archive sheets are kept
+        with self._lock:
+            self._sync(full)
+            return self.rows
+
+    def remove_rows(self, numbers, delete):
+        # delete() removes the given sheet rows from the live sheet. They
+        # stay in the snapshot, ahead of the live rows, and later syncs
+        # start that much higher.
+        with self._lock:
+            self._sync(False)
+            delete()
+            gone = {n - HEADER_ROWS - 1 for n in numbers}
+            live = self.rows[self.moved:]
+            moved = [row for i, row in enumerate(live) if i in gone]
+            self.rows = self.rows[:self.moved] + moved + [row for i, row in enumerate(live) if i not in gone]
+            self.moved += len(moved)
+            self._save_snapshot()
+
+    def invalidate(self):
+        # Rows already read were changed in place; re-read them all next time
+        self._stale = True
+
+    def read(self):
+        if self._stale:
+            self._stale = False
+            return self.sync(full=True)
+        if time.time() - self.synced_at >= self.ttl:
+            return self.sync()
+        return self.rows
@@ -0,0 +1,350 @@
+import contextlib
+import http.client
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import config
+from sheet_reader import HEADER_ROWS, column_letter
+
+# ----------------------------
+# Write-behind Sheet Writer
+# ----------------------------
+# Rows are spooled to a local JSONL file first, then flushed to the sheet
+# in a single append_rows call once MAX_BATCH rows are waiting or the oldest
+# has waited MAX_DELAY seconds. Failed flushes (usually the per-minute write
+# quota) back off exponentially and keep the rows in the spool, so a crash
+# or quota lockout never loses an analysis; leftovers are re-queued on start.
+# Only quota, server, auth and transport errors are retried. A batch that
+# fails any other way (e.g. a 400 for a malformed row) is resent one row at
+# a time, and the rows that still fail are moved to a dead-letter file next
+# to the spool, so one bad row can't hold up the rest.
+#
+# With a key column the writer upserts instead: rows whose key is already
+# on the sheet are rewritten in place with one ranged batch_update, found
+# through a key -> row number index built from a single read of the key
+# column and kept current as rows are appended. Target rows are checked
+# with one narrow read before each update, so rows moved or deleted by hand
+# only cost an index reload, never a wrong row. The key can span several
+# adjacent columns (the text archive keys on ID, column and part). paused() holds off flushes,
+# e.g. while archive.rotate deletes rows it has just checked.
+
+MAX_BATCH = 20
+MAX_DELAY = 5.0
+MAX_BACKOFF = 120
+MAX_TRACKED = 1000
+
+QUEUED = "queued"
+PERSISTED = "persisted"
+FAILED = "failed"
+
+# Quota, server errors and stale auth (services reopens the sheet on 401/403)
+RETRYABLE_CODES = (401, 403, 408, 429, 500, 502, 503, 504)
+
+UPDATED_RANGE = re.compile(r"!\$?[A-Z]+\$?(\d+)")
+
+
+def status_code(error):
+    # HTTP status of a gspread APIError (or a fakes.FakeAPIError), else None
+    code = getattr(error, "code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_CODES
+    # No HTTP status: connection resets, timeouts and the like
+    return isinstance(error, (OSError, TimeoutError, http.client.HTTPException))
+
+
+class RowIndex:
+    # key -> sheet row number; None until first loaded. columns: the key's
+    # column positions, next to each other
+
+    def __init__(self, columns):
+        self.columns = tuple(columns) if isinstance(columns, (tuple, list)) else (columns,)
+        self.rows = None
+
+    def key(self, cells):
+        # The key of a row (or of the cells read from its key columns)
+        values = [cells[i] if i < len(cells) else "" for i in self.columns]
+        return "|".join(str(value) for value in values) if all(value != "" for value in values) else None
+
+    def _range(self, first_row, last_row=""):
+        return f"{column_letter(self.columns[0])}{first_row}:{column_letter(self.columns[-1])}{last_row}"
+
+    def _cells(self, values):
+        # Cells read from _range(), padded back to full row positions
+        return [""] * self.columns[0] + list(values)
+
+    def load(self, sheet):
+        values = sheet.batch_get([self._range(HEADER_ROWS + 1)])[0]
+        keys = ((self.key(self._cells(cells)), n) for n, cells in enumerate(values, start=HEADER_ROWS + 1))
+        self.rows = {key: n for key, n in keys if key}
+
+    def reset(self):
+        self.rows = None
+
+    def key_cells(self, numbers):
+        return [self._range(n, n) for n in numbers]
+
+    def read_keys(self, cells):
+        # Keys out of batch_get(key_cells(...)) results
+        return [self.key(self._cells(values[0])) if values else None for values in cells]
+
+
+class SheetWriter:
+    def __init__(self, sheet_factory, spool_path=None, max_batch=MAX_BATCH, max_delay=MAX_DELAY, on_error=None, on_flush=None,
+                 key_column=None, on_update=None, retryable=is_retryable, dead_letter_path=None):
+        # sheet_factory returns the worksheet (real or fake) to write to; it is
+        # called on every flush so a reopened sheet is picked up
+        self.sheet_factory = sheet_factory
+        self.spool_path = spool_path or config.data_path("sheet_spool.jsonl")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.on_error = on_error
+        self.on_flush = on_flush  # called with (row count, seconds, succeeded)
+        self.on_update = on_update  # called with the row numbers rewritten in place
+        self.retryable = retryable  # error -> whether the flush is worth retrying
+        self.dead_letter_path = dead_letter_path or os.path.splitext(self.spool_path)[0] + "_failed.jsonl"
+        self.index = RowIndex(key_column) if key_column is not None else None
+        self.last_error = ""
+        self.failures = 0
+        self.dead_letters = 0
+
+        self._pending = []  # [(entry_id, row, queued_at)]
+        self._hold = threading.Lock()  # held around every write; see paused()
+        self._status = OrderedDict()
+        self._suspect = set()  # entries of a batch that failed for good; sent one by one
+        self._cond = threading.Condition()
+        self._flush_now = False
+
+        self._recover()
+        self._thread = threading.Thread(target=self._run, name="sheet-writer", daemon=True)
+        self._thread.start()
+
+    # ---- public API ----
+    def enqueue(self, row):
+        return self.enqueue_many([row])[0]
+
+    def enqueue_many(self, rows):
+        entries = [(uuid.uuid4().hex, row, time.time()) for row in rows]
+        with self._cond:
+            with open(self.spool_path, "a", encoding="utf-8") as fh:
+                for entry_id, row, _ in entries:
+                    fh.write(json.dumps({"id": entry_id, "row": row}) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._pending.extend(entries)
+            for entry_id, _, _ in entries:
+                self._track(entry_id, QUEUED)
+            self._cond.notify()
+        return [entry_id for entry_id, _, _ in entries]
+
+    def status(self, entry_id):
+        with self._cond:
+            return self._status.get(entry_id, PERSISTED)
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    @contextlib.contextmanager
+    def paused(self):
+        # No flush runs while this is held, e.g. while rows are being deleted
+        with self._hold:
+            yield
+
+    def reset_index(self):
+        # Call after rows were deleted or moved; the next flush reloads it
+        if self.index:
+            self.index.reset()
+
+    def flush(self, timeout=30):
+        # Ask the worker to flush now and wait until the queue drains
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_now = True
+            self._cond.notify()
+            while self._pending and time.monotonic() < deadline:
+                self._cond.wait(timeout=0.1)
+            return not self._pending
+
+    # ---- internals ----
+    def _track(self, entry_id, status):
+        self._status[entry_id] = status
+        self._status.move_to_end(entry_id)
+        while len(self._status) > MAX_TRACKED:
+            self._status.popitem(last=False)
+
+    def _recover(self):
+        if not os.path.exists(self.spool_path):
+            return
+        with open(self.spool_path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash mid-write
+                self._pending.append((entry["id"], entry["row"], 0.0))
+                self._track(entry["id"], QUEUED)
+
+    def _rewrite_spool(self):
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            for entry_id, row, _ in self._pending:
+                fh.write(json.dumps({"id": entry_id, "row": row}) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self.spool_path)
+
+    def _report_flush(self, rows, seconds, ok):
+        # Metrics must never take the writer thread down with them
+        if self.on_flush:
+            try:
+                self.on_flush(rows, seconds, ok)
+            except Exception:
+                pass
+
+    def _report_error(self, error):
+        if self.on_error:
+            try:
+                self.on_error(error)
+            except Exception:
+                pass
+
+    def _dead_letter(self, entry, error):
+        # Park a row that can never be written, and carry on with the rest
+        entry_id, row, _ = entry
+        with self._cond:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps({"id": entry_id, "row": row, "error": str(error), "failed_at": time.time()}) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._pending = [pending for pending in self._pending if pending[0] != entry_id]
+            self._suspect.discard(entry_id)
+            self._track(entry_id, FAILED)
+            self.dead_letters += 1
+            self._rewrite_spool()
+            if not self._pending:
+                self._flush_now = False
+            self._cond.notify_all()
+
+    def _key(self, row):
+        return self.index.key(row)
+
+    def _targets(self, sheet, keys):
+        # {key: row number} for keys already on the sheet. Row numbers from
+        # an older index are confirmed by reading their key cells first; on
+        # a mismatch the index is reloaded and only confirmed rows are used.
+        fresh = self.index.rows is None
+        if fresh:
+            self.index.load(sheet)
+        while True:
+            targets = {key: self.index.rows[key] for key in keys if key in self.index.rows}
+            if fresh or not targets:
+                return targets
+            cells = sheet.batch_get(self.index.key_cells(targets.values()))
+            confirmed = {
+                key: n for (key, n), found in zip(targets.items(), self.index.read_keys(cells))
+                if found == key
+            }
+            if len(confirmed) == len(targets):
+                return confirmed
+            self.index.load(sheet)
+            fresh = True
+
+    def _upsert(self, batch):
+        # Within a batch the latest row for a key wins (e.g. a double click)
+        keyed = {}
+        unkeyed = []
+        for row in batch:
+            key = self._key(row)
+            if key:
+                keyed[key] = row
+            else:
+                unkeyed.append(row)
+        sheet = self.sheet_factory()
+        targets = self._targets(sheet, keyed) if keyed else {}
+        if targets:
+            last = column_letter(max(len(keyed[key]) for key in targets) - 1)
+            sheet.batch_update([{"range": f"A{n}:{last}{n}", "values": [keyed[key]]} for key, n in targets.items()])
+            if self.on_update:
+                try:
+                    self.on_update(sorted(targets.values()))
+                except Exception:
+                    pass
+        appends = [(key, row) for key, row in keyed.items() if key not in targets] + [(None, row) for row in unkeyed]
+        if not appends:
+            return
+        response = sheet.append_rows([row for _, row in appends])
+        match = UPDATED_RANGE.search(str(((response or {}).get("updates") or {}).get("updatedRange", "")))
+        if match is None:
+            self.index.reset()  # don't know where they landed; reload next time
+            return
+        for offset, (key, _) in enumerate(appends):
+            if key:
+                self.index.rows[key] = int(match.group(1)) + offset
+
+    def _ready(self):
+        if not self._pending:
+            return False
+        if self._flush_now or len(self._pending) >= self.max_batch:
+            return True
+        return time.time() - self._pending[0][2] >= self.max_delay
+
+    def _run(self):
+        backoff_until = 0.0
+        while True:
+            with self._cond:
+                while not self._ready() or time.monotonic() < backoff_until:
+                    self._cond.wait(timeout=0.5)
+                batch = self._pending[:1 if self._pending[0][0] in self._suspect else self.max_batch]
+
+            started = time.perf_counter()
+            try:
+                with self._hold:
+                    if self.index:
+                        self._upsert([row for _, row, _ in batch])
+                    else:
+                        self.sheet_factory().append_rows([row for _, row, _ in batch])
+            except Exception as e:
+                self._report_flush(len(batch), time.perf_counter() - started, False)
+                self.last_error = str(e)
+                self._report_error(e)
+                if not self.retryable(e):
+                    if len(batch) > 1:
+                        with self._cond:
+                            self._suspect.update(entry_id for entry_id, _, _ in batch)
+                    else:
+                        self._dead_letter(batch[0], e)
+                    continue
+                self.failures += 1
+                delay = min(MAX_BACKOFF, 2 ** self.failures) + random.uniform(0, 1)
+                backoff_until = time.monotonic() + delay
+                continue
+
+            self._report_flush(len(batch), time.perf_counter() - started, True)
+            self.failures = 0
+            self.last_error = ""
+            with self._cond:
+                done = {entry_id for entry_id, _, _ in batch}
+                self._pending = [entry for entry in self._pending if entry[0] not in done]
+                self._suspect -= done
+                for entry_id in done:
+                    self._track(entry_id, PERSISTED)
+                self._rewrite_spool()
+                if not self._pending:
+                    self._flush_now = False
+                self._cond.notify_all()
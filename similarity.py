@@ -0,0 +1,267 @@
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+import analysis
+import analysis_store
+import config
+
+# ----------------------------
+# Similar Candidates Index
+# ----------------------------
+# Every analysis gets embedded twice, once for the tour plan (Q3) and once
+# for the whole write-up (the Q1 call summary, Q2, Q3 and the Local
+# Knowledge explanation). Vectors are appended to a float16 file per kind
+# that is searched through a memory map, so adding an analysis appends one
+# row and nothing is ever rebuilt. Entries are keyed on the Analysis Key; a
+# re-scored analysis appends a new row that hides the old one. The default
+# embedder is a local hashing model, so this works offline; Gemini
+# embeddings can be switched on where there's a key.
+
+KINDS = ("tour_plan", "overall")
+TOP_K = 5
+SEARCH_BLOCK = 8192
+
+STOPWORDS = set("""a an and are as at be but by do for from has have he her his i if in is it its me my of on or our
+she so that the their them they this to was we were what when which who will with you your about also would there
+can could just like really some think they're it's i'm candidate""".split())
+
+
+def record_from_row(row):
+    # Sheet row (AnalysisResult.to_row layout) to the fields the index uses
+    q1, q2, q3, q4 = (row[analysis_store.ANSWERS] + [""] * 4)[:4]
+    return {
+        "analysis_key": analysis_store.row_key(row, str(row[analysis_store.TRANSCRIPT])),
+        "timestamp": str(row[analysis_store.TIMESTAMP]),
+        "interviewer": row[analysis_store.INTERVIEWER],
+        "candidate": row[analysis_store.CANDIDATE],
+        "q1": q1, "q2": q2, "q3": q3, "q4": q4,
+        "total_score": row[analysis_store.TOTAL] if len(row) > analysis_store.TOTAL else None,
+    }
+
+
+def record_key(record):
+    return record.get("analysis_key") or f"{record['timestamp']}|{record['interviewer']}|{record['candidate']}"
+
+
+def digest(record):
+    # Changes when anything the index shows or embeds does
+    fields = ["" if record[name] is None else str(record[name])
+              for name in ("timestamp", "q1", "q2", "q3", "q4", "total_score")]
+    return zlib.crc32(json.dumps(fields).encode("utf-8"))
+
+
+def texts_for(record):
+    # Q1 is the model's summary of the call; the Local Knowledge explanation
+    # is read back out of the rubric text so stored analyses embed the same way
+    match = analysis.SCORE_PATTERNS["Local Knowledge"].search(record["q4"] or "")
+    local_knowledge = match.group(2).strip() if match else ""
+    return {
+        "tour_plan": record["q3"] or "",
+        "overall": "\n".join(filter(None, [record["q1"], record["q2"], record["q3"], local_knowledge])),
+    }
+
+
+# ---- embedding backends ----
+class HashingEmbedder:
+    # Feature hashing of word unigrams and bigrams with log term weights;
+    # no model download, and stable across processes (crc32, not hash())
+    name = "hashing"
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [w for w in re.findall(r"[^\W\d_]+", text.lower()) if w not in STOPWORDS]
+            features = Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+            for feature, count in features.items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                vectors[row, h % self.dim] += sign * (1.0 + math.log(count))
+        return vectors
+
+
+class GeminiEmbedder:
+    name = "gemini"
+
+    def __init__(self, model="models/text-embedding-004", dim=768):
+        self.model = model
+        self.dim = dim
+
+    def embed(self, texts):
+        import google.generativeai as genai
+
+        result = genai.embed_content(model=self.model, content=list(texts), task_type="SEMANTIC_SIMILARITY")
+        return np.asarray(result["embedding"], dtype=np.float32).reshape(len(texts), self.dim)
+
+
+BACKENDS = {
+    "hashing": HashingEmbedder,
+    "gemini": GeminiEmbedder,
+}
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# ---- index ----
+class EmbeddingIndex:
+    def __init__(self, embedder=None, directory=None):
+        self.embedder = embedder or HashingEmbedder()
+        # Vectors from different backends don't mix, so each gets its own files
+        self.directory = directory or config.data_path(os.path.join("embeddings", self.embedder.name))
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._meta = {kind: self._load_meta(kind) for kind in KINDS}
+        # A crash between the per-kind writes leaves one kind a row ahead.
+        # Indexes from before entries had a digest were keyed on timestamp
+        # and names, so they're cleared and rebuilt by backfill().
+        legacy = any("digest" not in entry for entries in self._meta.values() for entry in entries)
+        rows = 0 if legacy else min(len(entries) for entries in self._meta.values())
+        for kind, entries in self._meta.items():
+            if len(entries) > rows:
+                self._meta[kind] = entries[:rows]
+                self._truncate(kind, self._meta[kind], rows)
+        # Latest entry per key, and the rows it replaced
+        self._latest = {}
+        self._hidden = set()
+        for row, entry in enumerate(self._meta["overall"]):
+            self._replace(entry["key"], row, entry["digest"])
+        self._maps = {}
+
+    def _replace(self, key, row, entry_digest):
+        if key in self._latest:
+            self._hidden.add(self._latest[key][0])
+        self._latest[key] = (row, entry_digest)
+
+    def _path(self, kind, ext):
+        return os.path.join(self.directory, f"{kind}.{ext}")
+
+    def _load_meta(self, kind):
+        entries = []
+        if os.path.exists(self._path(kind, "jsonl")):
+            with open(self._path(kind, "jsonl"), encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # torn final line from a crash mid-write
+        # Keep vectors and metadata the same length if one write was cut short
+        rows = self._rows_on_disk(kind)
+        if rows != len(entries):
+            count = min(rows, len(entries))
+            entries = entries[:count]
+            self._truncate(kind, entries, count)
+        return entries
+
+    def _rows_on_disk(self, kind):
+        path = self._path(kind, "f16")
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // (2 * self.embedder.dim)
+
+    def _truncate(self, kind, entries, count):
+        with open(self._path(kind, "f16"), "ab") as fh:
+            fh.truncate(count * 2 * self.embedder.dim)
+        with open(self._path(kind, "jsonl"), "w", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+    def _matrix(self, kind):
+        rows = len(self._meta[kind])
+        cached = self._maps.get(kind)
+        if cached is None or cached.shape[0] != rows:
+            if rows == 0:
+                return np.zeros((0, self.embedder.dim), dtype=np.float16)
+            cached = np.memmap(self._path(kind, "f16"), dtype=np.float16, mode="r", shape=(rows, self.embedder.dim))
+            self._maps[kind] = cached
+        return cached
+
+    def __len__(self):
+        return len(self._latest)
+
+    def __contains__(self, key):
+        return key in self._latest
+
+    def is_current(self, record):
+        return self._latest.get(record_key(record), (None, None))[1] == digest(record)
+
+    def add(self, record):
+        return self.add_many([record])
+
+    def add_many(self, records):
+        # records as built by record_from_row (or AnalysisStore.answers());
+        # ones already indexed unchanged are skipped, so re-adding is harmless
+        with self._lock:
+            records = list({record_key(r): r for r in records if not self.is_current(r)}.values())
+            if not records:
+                return 0
+            first = len(self._meta["overall"])
+            for kind in KINDS:
+                texts = [texts_for(record)[kind] for record in records]
+                vectors = _normalize(self.embedder.embed(texts)).astype(np.float16)
+                metas = [
+                    {"key": record_key(r), "digest": digest(r), "timestamp": r["timestamp"], "candidate": r["candidate"],
+                     "interviewer": r["interviewer"], "total_score": r["total_score"], "text": text[:300]}
+                    for r, text in zip(records, texts)
+                ]
+                with open(self._path(kind, "f16"), "ab") as fh:
+                    fh.write(vectors.tobytes())
+                with open(self._path(kind, "jsonl"), "a", encoding="utf-8") as fh:
+                    fh.writelines(json.dumps(meta) + "\n" for meta in metas)
+                self._meta[kind].extend(metas)
+            for row, record in enumerate(records, start=first):
+                self._replace(record_key(record), row, digest(record))
+            return len(records)
+
+    def search(self, text, kind="tour_plan", k=TOP_K, exclude_candidate=None):
+        with self._lock:
+            matrix = self._matrix(kind)
+            meta = list(self._meta[kind])
+            hidden = list(self._hidden)
+        if not len(meta) or not text.strip():
+            return []
+        query = _normalize(self.embedder.embed([text]))[0]
+        # float16 on disk, float32 maths: upcast a block at a time
+        scores = np.concatenate([
+            matrix[start:start + SEARCH_BLOCK].astype(np.float32) @ query
+            for start in range(0, len(matrix), SEARCH_BLOCK)
+        ])
+        scores[hidden] = -np.inf
+        if exclude_candidate:
+            excluded = np.array([m.get("candidate", "").casefold() == exclude_candidate.casefold() for m in meta])
+            scores[excluded] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{**meta[i], "similarity": round(float(scores[i]), 3)} for i in top if np.isfinite(scores[i])]
+
+
+def backfill(index, store, batch_size=200):
+    # Index every stored analysis that isn't in the index, or has changed
+    added = 0
+    batch = []
+    for record in store.answers():
+        if index.is_current(record):
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            added += index.add_many(batch)
+            batch = []
+    return added + index.add_many(batch)
+
+
+def get_embedder(name, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {name!r}; choose from {', '.join(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
@@ -0,0 +1,70 @@
+import functools
+import os
+import re
+
+# ----------------------------
+# Prompt Templates
+# ----------------------------
+# Prompts live in prompts/<name>_v<N>.txt and are read once per process.
+# A template file is split into [sections]: [prefix] is the static part
+# shared by every call, optional [format:<mode>] sections pick the response
+# format, and [candidate] holds the per-call data. Keeping the static text
+# first lets Gemini reuse (cache) it across calls.
+
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+SECTION_HEADER = re.compile(r"^\[([\w:-]+)\]$")
+
+
+class PromptTemplate:
+    def __init__(self, name, version, sections):
+        self.name = name
+        self.version = version
+        self.sections = sections
+
+    @property
+    def version_id(self):
+        return f"{self.name}_v{self.version}"
+
+    def prefix(self, fmt=None):
+        text = self.sections["prefix"]
+        if fmt:
+            text += self.sections[f"format:{fmt}"]
+        return text
+
+    def render(self, fmt=None, **values):
+        return self.prefix(fmt) + self.sections["candidate"].format(**values)
+
+
+def parse_template(text):
+    sections = {}
+    current = None
+    for line in text.splitlines(keepends=True):
+        header = SECTION_HEADER.match(line.strip())
+        if header:
+            current = header.group(1)
+            sections[current] = ""
+        elif current is None:
+            if line.strip() and not line.startswith("#"):
+                raise ValueError("Prompt template text must come after a [section] header")
+        else:
+            sections[current] += line
+    if "prefix" not in sections or "candidate" not in sections:
+        raise ValueError("Prompt template needs [prefix] and [candidate] sections")
+    return sections
+
+
+def available_versions(name):
+    pattern = re.compile(rf"^{re.escape(name)}_v(\d+)\.txt$")
+    return sorted(int(m.group(1)) for m in map(pattern.match, os.listdir(PROMPT_DIR)) if m)
+
+
+@functools.lru_cache(maxsize=None)
+def load(name, version=None):
+    # Latest version unless one is pinned
+    if version is None:
+        versions = available_versions(name)
+        if not versions:
+            raise FileNotFoundError(f"No prompt template named {name!r} in {PROMPT_DIR}")
+        version = versions[-1]
+    with open(os.path.join(PROMPT_DIR, f"{name}_v{version}.txt"), encoding="utf-8") as fh:
+        return PromptTemplate(name, version, parse_template(fh.read()))
@@ -0,0 +1,103 @@
+import contextlib
+from datetime import date
+
+import pytest
+
+import analysis
+import archive
+import fakes
+import jobs
+from sheet_reader import SheetReader
+from sheet_writer import SheetWriter
+
+KEY = analysis.ANALYSIS_KEY_COLUMN
+TODAY = date(2026, 10, 17)
+
+
+def row(key, day, score="3"):
+    return [f"{day} 10:00:00", "Yul", key.upper(), "transcript"] + [score] * (KEY - 4) + [key]
+
+
+@pytest.fixture
+def live():
+    sheet = fakes.FakeWorksheet(jitter=0)
+    sheet.rows.append(["header"] * (KEY + 1))
+    sheet.rows += [row(f"old{n}", f"2026-05-0{n + 1}") for n in range(4)]
+    sheet.rows += [row(f"new{n}", f"2026-10-0{n + 1}") for n in range(2)]
+    return sheet
+
+
+@pytest.fixture
+def months():
+    return {}
+
+
+@pytest.fixture
+def month_sheet(months):
+    def open_month(title, header):
+        if title not in months:
+            months[title] = fakes.FakeWorksheet(jitter=0)
+            months[title].rows.append(list(header))
+        return months[title]
+    return open_month
+
+
+@pytest.fixture
+def reader(live, tmp_path):
+    reader = SheetReader(lambda: live, snapshot_path=str(tmp_path / "snapshot.json"))
+    reader.sync()
+    return reader
+
+
+def keys(sheet):
+    return [cells[KEY] for cells in sheet.rows[1:]]
+
+
+def rotate(live, month_sheet, reader, **kwargs):
+    return archive.rotate(jobs.Job(timeout=60), live, month_sheet, reader, 90, today=TODAY, **kwargs)
+
+
+def test_rows_are_picked_by_date(live, month_sheet, months, reader, tmp_path):
+    # An upsert rewrote old1 in place with today's timestamp
+    writer = SheetWriter(lambda: live, spool_path=str(tmp_path / "spool.jsonl"), max_delay=0.01, key_column=KEY)
+    writer.enqueue(row("old1", "2026-10-17", score="5"))
+    assert writer.flush(5)
+
+    result = rotate(live, month_sheet, reader, hold=writer.paused, on_moved=lambda count: writer.reset_index())
+
+    assert result == {"moved": 3, "months": ["Archive 2026-05"], "changed": 0}
+    assert keys(live) == ["old1", "new0", "new1"]
+    assert keys(months["Archive 2026-05"]) == ["old0", "old2", "old3"]
+    assert [r["candidate"] for r in reader.sync()] == ["OLD0", "OLD2", "OLD3", "OLD1", "NEW0", "NEW1"]
+
+    # The writer still finds the row after the delete
+    writer.enqueue(row("old1", "2026-10-17", score="2"))
+    assert writer.flush(5)
+    assert keys(live) == ["old1", "new0", "new1"]
+    assert live.rows[1][4] == "2"
+
+
+def test_row_upserted_during_rotation_stays_live(live, month_sheet, months, reader):
+    # old2 is rewritten after it was copied but before the delete
+    @contextlib.contextmanager
+    def hold():
+        live.rows[3] = row("old2", "2026-10-17", score="5")
+        yield
+
+    result = rotate(live, month_sheet, reader, hold=hold)
+
+    assert result["moved"] == 3
+    assert result["changed"] == 1
+    assert keys(live) == ["old2", "new0", "new1"]
+    assert live.rows[1][4] == "5"
+    # The stale copy on the month sheet is superseded by the live row
+    rows = archive.read_rows([months["Archive 2026-05"].get_all_values(), live.get_all_values()],
+                             archive.TextArchive(":memory:"))
+    assert [cells[KEY] for cells in rows] == ["old0", "old1", "old3", "old2", "new0", "new1"]
+    assert rows[3][4] == "5"
+
+
+def test_rotation_can_be_rerun(live, month_sheet, months, reader):
+    rotate(live, month_sheet, reader)
+    assert rotate(live, month_sheet, reader) == {"moved": 0, "months": [], "changed": 0}
+    assert keys(months["Archive 2026-05"]) == ["old0", "old1", "old2", "old3"]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import analysis
+import analysis_cache
+import batch
+import chunking
+import fakes
+from gemini_client import ResilientModel
+
+RESPONSE = json.dumps({
+    "q1": "a",
+    "q2": "b",
+    "q3": "c",
+    "rubric": {field: {"score": 4, "explanation": "e"} for field in analysis.RUBRIC_FIELDS.values()},
+    "total_score": 24,
+})
+
+
+class FlakyModel(fakes.FakeModel):
+    # Fails its first `failures` calls with a quota error
+    def __init__(self, failures, **kwargs):
+        super().__init__(RESPONSE, RESPONSE, jitter=0, **kwargs)
+        self.failures = failures
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.failures -= 1
+            failing = self.failures >= 0
+        if failing:
+            self.calls += 1
+            raise fakes.FakeAPIError(429, "Quota exceeded")
+        return super().generate_content(prompt, **kwargs)
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.calls = 0
+
+    def wait(self):
+        self.calls += 1
+
+
+def resilient(model, **kwargs):
+    return ResilientModel(model, sleep=lambda seconds: None, **kwargs)
+
+
+def item():
+    return batch.new_item("a.txt", "Yul", "Ann", "Yul: Hi\nAnn: Hello there")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return analysis_cache.AnalysisCache(str(tmp_path / "cache.sqlite"))
+
+
+def cached_count(cache):
+    return cache._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+
+def test_retries_report_the_answering_model():
+    model = resilient(FlakyModel(2, model_name="models/gemini-2.5-pro"))
+    reply = model.generate_content("prompt")
+    assert reply.call_info == {"model": "gemini-2.5-pro", "retries": 2, "hedged": False}
+    model.shutdown()
+
+
+def test_main_model_answer_is_cached(cache):
+    model = resilient(FlakyModel(1, model_name="models/gemini-2.5-pro"))
+    done = batch.analyze_item(model, "gemini-2.5-pro", item(), CountingLimiter(), cache)
+    assert done["status"] == "done"
+    assert cached_count(cache) == 1
+    model.shutdown()
+
+
+def test_fallback_answer_is_not_cached(cache):
+    main = FlakyModel(100, model_name="models/gemini-2.5-pro")
+    fallback = FlakyModel(0, model_name="models/gemini-2.5-flash")
+    model = resilient(main, fallback=fallback, failure_threshold=1)
+    done = batch.analyze_item(model, "gemini-2.5-pro", item(), CountingLimiter(), cache)
+    assert done["status"] == "done"
+    assert done["result"].meta["Model"] == "gemini-2.5-flash"
+    assert cached_count(cache) == 0
+    model.shutdown()
+
+
+def test_rate_limiter_sees_every_retry():
+    flaky = FlakyModel(2)
+    model = resilient(flaky)
+    limiter = CountingLimiter()
+    done = batch.analyze_item(model, "models/fake-gemini", item(), limiter)
+    assert done["status"] == "done"
+    assert done["attempts"] == 3
+    assert limiter.calls == flaky.calls == 3
+    model.shutdown()
+
+
+def test_evidence_calls_are_rate_limited_per_attempt(monkeypatch):
+    monkeypatch.setattr(chunking, "MAX_PARALLEL_CHUNKS", 1)
+    flaky = FlakyModel(1)
+    model = resilient(flaky)
+    limiter = CountingLimiter()
+    notes, chunks = chunking.extract_evidence(model, "Ann", "Yul: Hi\nAnn: Hello there", before_call=limiter.wait)
+    assert chunks == 1
+    assert limiter.calls == flaky.calls == 2
+    model.shutdown()
@@ -0,0 +1,35 @@
+import pytest
+
+import preprocess
+
+
+def clean(text):
+    return list(preprocess.strip_filler([text]))[0]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("I I think so", "I think so"),
+    ("we went to the the market", "we went to the market"),
+    ("and, and then we left", "and then we left"),
+    ("The the old town", "The old town"),
+    ("so so so anyway", "so anyway"),
+])
+def test_stutters_are_collapsed(text, expected):
+    assert clean(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "We drove to Walla Walla",
+    "a week in Bora Bora",
+    "he had had enough",
+    "it was very very busy",
+    "the A A Milne house",
+    "New York, New York",
+])
+def test_repeats_that_are_not_stutters_are_kept(text):
+    assert clean(text) == text
+
+
+def test_standard_mode_keeps_place_names():
+    cleaned, _ = preprocess.preprocess("Candidate: um I I grew up near Walla Walla", "standard")
+    assert cleaned == "Candidate: I grew up near Walla Walla"
@@ -0,0 +1,70 @@
+import pytest
+
+import analysis
+import fakes
+from sheet_writer import SheetWriter
+
+KEY = analysis.ANALYSIS_KEY_COLUMN
+
+
+def row(key, timestamp="2026-10-17 10:00:00", score="3"):
+    return [timestamp, "Yul", key.upper(), "transcript"] + [score] * (KEY - 4) + [key]
+
+
+@pytest.fixture
+def sheet():
+    sheet = fakes.FakeWorksheet(jitter=0)
+    sheet.rows.append(["header"] * (KEY + 1))
+    sheet.rows += [row(f"old{n}", f"2026-01-0{n + 1} 10:00:00") for n in range(5)]
+    return sheet
+
+
+@pytest.fixture
+def writer(sheet, tmp_path):
+    updated = []
+    writer = SheetWriter(lambda: sheet, spool_path=str(tmp_path / "spool.jsonl"), max_delay=0.01, key_column=KEY,
+                         on_update=updated.extend)
+    writer.updated = updated
+    return writer
+
+
+def keys(sheet):
+    return [cells[KEY] for cells in sheet.rows[1:]]
+
+
+def test_resubmit_rewrites_row_in_place(sheet, writer):
+    writer.enqueue(row("old2", score="5"))
+    assert writer.flush(5)
+    assert keys(sheet) == ["old0", "old1", "old2", "old3", "old4"]
+    assert sheet.rows[3][4] == "5"
+    assert writer.updated == [4]
+
+
+def test_latest_row_in_a_batch_wins(sheet, writer):
+    writer.enqueue_many([row("new", score="1"), row("new", score="2")])
+    assert writer.flush(5)
+    assert keys(sheet).count("new") == 1
+    assert sheet.rows[-1][4] == "2"
+
+
+def test_row_moved_by_hand(sheet, writer):
+    writer.enqueue(row("old3", score="1"))
+    assert writer.flush(5)
+    # Rows above it deleted by hand: the index is stale by two rows
+    del sheet.rows[1:3]
+    writer.enqueue(row("old3", score="2"))
+    assert writer.flush(5)
+    assert keys(sheet) == ["old2", "old3", "old4"]
+    assert sheet.rows[2][4] == "2"
+    assert [cells[4] for cells in sheet.rows[1:]] == ["3", "2", "3"]
+
+
+def test_row_deleted_by_hand(sheet, writer):
+    writer.enqueue(row("old1", score="1"))
+    assert writer.flush(5)
+    del sheet.rows[2]
+    writer.enqueue(row("old1", score="2"))
+    assert writer.flush(5)
+    assert keys(sheet) == ["old0", "old2", "old3", "old4", "old1"]
+    assert sheet.rows[-1][4] == "2"
+    assert [cells[4] for cells in sheet.rows[1:-1]] == ["3"] * 4
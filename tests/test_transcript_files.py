@@ -0,0 +1,57 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+import transcript_files
+
+DOCUMENT = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    "<w:p><w:r><w:t>Yul: Hi there</w:t></w:r></w:p>"
+    "<w:p><w:r><w:t>Ann: Hello</w:t></w:r></w:p>"
+    "</w:body></w:document>"
+)
+
+
+def docx(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_docx():
+    turns = transcript_files.parse("call.docx", docx({"word/document.xml": DOCUMENT}))
+    assert turns == [["Yul", "Hi there"], ["Ann", "Hello"]]
+
+
+def test_json():
+    data = {"segments": [{"speaker": "Yul", "text": "Hi there"}, {"speaker": {"name": "Ann"}, "words": ["Hello", "again"]}]}
+    turns = transcript_files.parse("call.json", io.BytesIO(json.dumps(data).encode("utf-8")))
+    assert turns == [["Yul", "Hi there"], ["Ann", "Hello again"]]
+
+
+@pytest.mark.parametrize("data", [b"5", b'"just text"', b"null", b"{not json", b"\xff\xfe\x00", b"[" * 100000])
+def test_bad_json(data):
+    with pytest.raises(transcript_files.TranscriptFileError):
+        transcript_files.parse("call.json", io.BytesIO(data))
+
+
+@pytest.mark.parametrize("upload", [
+    lambda: io.BytesIO(b"not a zip file"),
+    lambda: docx({"word/other.xml": DOCUMENT}),
+    lambda: docx({"word/document.xml": DOCUMENT[:120]}),
+    lambda: docx({"word/document.xml": "<w:document><unclosed>"}),
+])
+def test_bad_docx(upload):
+    with pytest.raises(transcript_files.TranscriptFileError):
+        transcript_files.parse("call.docx", upload())
+
+
+def test_truncated_docx():
+    data = docx({"word/document.xml": DOCUMENT * 50}).getvalue()
+    with pytest.raises(transcript_files.TranscriptFileError):
+        transcript_files.parse("call.docx", io.BytesIO(data[:len(data) // 2]))
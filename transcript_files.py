@@ -0,0 +1,127 @@
+import io
+import json
+import os
+import re
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+import preprocess
+
+# ----------------------------
+# Transcript Files
+# ----------------------------
+# Parses uploaded meeting transcripts (WebVTT, SRT, DOCX, plain text and
+# JSON exports) into a compact list of (speaker, text) turns. Text formats
+# are read line by line straight from the upload and DOCX paragraph by
+# paragraph, so the file is never decoded into one big string; the turns
+# are what the page keeps in session_state and joins for analysis.
+
+EXTENSIONS = ("vtt", "srt", "docx", "txt", "md", "json")
+
+VOICE_TAG = re.compile(r"<v(?:\.[\w.]+)?\s+([^>]+)>")
+CAPTION_TAG = re.compile(r"</?[^>]+>")
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Keys seen in Zoom, Otter, Teams and Meet JSON exports
+SPEAKER_KEYS = ("speaker", "speaker_name", "speakerName", "name", "participant", "user")
+TEXT_KEYS = ("text", "transcript", "content", "caption", "words")
+LIST_KEYS = ("segments", "transcript", "results", "entries", "utterances", "timeline")
+
+
+class TranscriptFileError(ValueError):
+    pass
+
+
+def _text_lines(fh):
+    reader = io.TextIOWrapper(fh, encoding="utf-8-sig", errors="replace", newline=None)
+    try:
+        for line in reader:
+            yield line.rstrip("\n")
+    finally:
+        reader.detach()  # leave the upload open for Streamlit
+
+
+def _caption_lines(fh):
+    # WebVTT/SRT: <v Name> voice tags become "Name:" labels, other markup goes
+    for line in _text_lines(fh):
+        line = VOICE_TAG.sub(lambda m: f"{m.group(1).strip()}: ", line)
+        yield CAPTION_TAG.sub("", line)
+
+
+def _docx_lines(fh):
+    try:
+        archive = zipfile.ZipFile(fh)
+        document = archive.open("word/document.xml")
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise TranscriptFileError("Not a valid .docx file") from e
+    # A truncated or corrupt file only shows up part way through the read
+    try:
+        with document:
+            for event, element in ElementTree.iterparse(document):
+                if element.tag == f"{WORD_NS}p":
+                    yield "".join(node.text or "" for node in element.iter(f"{WORD_NS}t"))
+                    element.clear()
+    except (ElementTree.ParseError, zipfile.BadZipFile, zlib.error, EOFError) as e:
+        raise TranscriptFileError("Not a valid .docx file") from e
+
+
+def _json_value(entry, keys):
+    for key in keys:
+        value = entry.get(key)
+        if isinstance(value, dict):
+            value = _json_value(value, ("name", "text", "display_name"))
+        if isinstance(value, list):
+            value = " ".join(str(w.get("text", w.get("word", ""))) if isinstance(w, dict) else str(w) for w in value)
+        if value:
+            return str(value).strip()
+    return ""
+
+
+def _json_lines(fh):
+    # JSON exports are parsed whole; it's the upload being read, not a widget value
+    reader = io.TextIOWrapper(fh, encoding="utf-8-sig")
+    try:
+        data = json.load(reader)
+    except (json.JSONDecodeError, UnicodeDecodeError, RecursionError) as e:
+        raise TranscriptFileError(f"Not a valid JSON transcript: {e}") from e
+    finally:
+        reader.detach()
+    if not isinstance(data, (list, dict)):
+        raise TranscriptFileError("Not a JSON transcript: expected a list of entries or an object")
+    if isinstance(data, dict):
+        data = next((data[k] for k in LIST_KEYS if isinstance(data.get(k), list)), [data])
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        text = _json_value(entry, TEXT_KEYS)
+        if text:
+            speaker = _json_value(entry, SPEAKER_KEYS)
+            yield f"{speaker}: {text}" if speaker else text
+
+
+def _extension(name):
+    return os.path.splitext(name)[1].lower().lstrip(".")
+
+
+def _lines_for(name, fh):
+    extension = _extension(name)
+    if extension in ("vtt", "srt"):
+        return _caption_lines(fh)
+    if extension == "docx":
+        return _docx_lines(fh)
+    if extension == "json":
+        return _json_lines(fh)
+    if extension in ("txt", "md"):
+        return _text_lines(fh)
+    raise TranscriptFileError(f"Unsupported transcript file type: .{extension}")
+
+
+def parse(name, fh):
+    # Returns [(speaker, text)]; speaker is None for unlabelled text. Only
+    # caption files lose their cue timing here; anything else in the text is
+    # left to the preprocessing mode picked on the page.
+    lines = filter(None, (line.strip() for line in _lines_for(name, fh)))
+    if _extension(name) in ("vtt", "srt"):
+        lines = preprocess.dedupe_captions(preprocess.strip_timing(lines))
+    return [[speaker, text] for speaker, text in preprocess.speaker_turns(lines)]